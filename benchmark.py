@@ -0,0 +1,375 @@
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("GRA_TELEMETRY", "0")
+
+import argparse
+import bisect
+import csv
+import json
+import math
+import random
+import sys
+import time
+from collections import defaultdict
+
+import pygame
+
+from main import ElixirGame, FingertipFilter, GameState, SCREEN_WIDTH, SCREEN_HEIGHT
+
+FRAME_DT = 1 / 60
+CAMERA_DT = 1 / 30
+CAMERA_LATENCY = 0.03
+REST_POSITION = (60, 60)
+HOLD_FRAMES = 120
+MAX_FRAMES = 60 * 120
+LAG_SEARCH_MAX = 0.2
+LAG_SEARCH_STEP = 0.005
+
+TIMED_METHODS = [
+    "handle_events",
+    "update_input",
+    "draw_start_screen",
+    "draw_difficulty_screen",
+    "draw_easy_game_screen",
+    "draw_end_success_screen",
+    "draw_end_failure_screen",
+    "update_timers",
+    "check_ingredient_clicks",
+    "draw_finger_cursor",
+]
+
+SUITE = [
+    ("easy_dirty", "easy", "surface", True),
+    ("easy_full", "easy", "surface", False),
+    ("easy_texture", "easy", "software", False),
+    ("hard_dirty", "hard", "surface", True),
+    ("hard_full", "hard", "surface", False),
+    ("hard_texture", "hard", "software", False),
+]
+
+
+class FixedClock:
+    def __init__(self, start=0.0):
+        self.t = start
+
+    def __call__(self):
+        return self.t
+
+    def advance(self, dt):
+        self.t += dt
+
+
+class ScriptedTrace:
+    def __init__(self, difficulty="easy", seed=0, speed=1500.0, jitter=2.0):
+        self.difficulty = difficulty
+        self.random = random.Random(seed)
+        self.speed = speed
+        self.jitter = jitter
+        self.x, self.y = REST_POSITION
+        self.last_time = None
+
+    def target(self, game):
+        if game.state == GameState.START:
+            rect = game.button_positions["start"]
+        elif game.state == GameState.DIFFICULTY:
+            rect = game.button_positions[self.difficulty]
+        elif game.state == GameState.EASY_GAME:
+            if game.sequence_playing or game.showing_error:
+                return REST_POSITION
+            rect = game.ingredient_positions[game.current_recipe[len(game.player_sequence)]]
+        else:
+            return REST_POSITION
+        
+        x, y, w, h = rect
+        return (x + w // 2, y + h // 2)
+
+    def position(self, game, t):
+        dt = 0.0 if self.last_time is None else t - self.last_time
+        self.last_time = t
+        
+        tx, ty = self.target(game)
+        dx = tx - self.x
+        dy = ty - self.y
+        distance = math.hypot(dx, dy)
+        step = self.speed * dt
+        if distance <= step or distance == 0:
+            self.x, self.y = tx, ty
+        else:
+            self.x += dx / distance * step
+            self.y += dy / distance * step
+        
+        x = self.x + self.random.gauss(0, self.jitter)
+        y = self.y + self.random.gauss(0, self.jitter)
+        return (max(0, min(SCREEN_WIDTH - 1, x)), max(0, min(SCREEN_HEIGHT - 1, y)))
+
+
+class RecordedTrace:
+    def __init__(self, path):
+        self.times = []
+        self.positions = []
+        with open(path, newline="") as f:
+            for row in csv.DictReader(f):
+                self.times.append(float(row["t"]))
+                if row["x"] and row["y"]:
+                    self.positions.append((float(row["x"]), float(row["y"])))
+                else:
+                    self.positions.append(None)
+
+    def rows(self):
+        return list(zip(self.times, self.positions))
+
+    def position(self, game, t):
+        index = bisect.bisect_right(self.times, t) - 1
+        if index < 0:
+            return None
+        return self.positions[index]
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples):
+    summary = {}
+    for name, values in samples.items():
+        summary[name] = {
+            "count": len(values),
+            "p50_ms": percentile(values, 0.50) * 1000,
+            "p95_ms": percentile(values, 0.95) * 1000,
+            "p99_ms": percentile(values, 0.99) * 1000,
+            "max_ms": max(values) * 1000 if values else 0.0,
+        }
+    return summary
+
+
+def replay_filter(rows):
+    filt = FingertipFilter()
+    raw = []
+    filtered = []
+    for t, position in rows:
+        if position is None:
+            filt.reset()
+            raw.append((t, None))
+            filtered.append((t, None))
+        else:
+            raw.append((t, position))
+            filtered.append((t, filt.update(position[0], position[1], t)))
+    return raw, filtered
+
+
+def jitter(series):
+    accelerations = []
+    for (_, a), (_, b), (_, c) in zip(series, series[1:], series[2:]):
+        if a is None or b is None or c is None:
+            continue
+        accelerations.append(math.hypot(a[0] - 2 * b[0] + c[0], a[1] - 2 * b[1] + c[1]))
+    if not accelerations:
+        return 0.0
+    return math.sqrt(sum(value * value for value in accelerations) / len(accelerations))
+
+
+def interpolate(series, times, t):
+    index = bisect.bisect_right(times, t) - 1
+    if index < 0 or index + 1 >= len(series):
+        return None
+    (t0, a), (t1, b) = series[index], series[index + 1]
+    if a is None or b is None:
+        return None
+    u = (t - t0) / (t1 - t0) if t1 > t0 else 0.0
+    return (a[0] + (b[0] - a[0]) * u, a[1] + (b[1] - a[1]) * u)
+
+
+def estimate_lag(raw, filtered):
+    times = [t for t, _ in raw]
+    best_lag, best_error = 0.0, None
+    steps = int(round(LAG_SEARCH_MAX / LAG_SEARCH_STEP))
+    for i in range(steps + 1):
+        lag = i * LAG_SEARCH_STEP
+        errors = []
+        for t, position in filtered:
+            if position is None:
+                continue
+            reference = interpolate(raw, times, t - lag)
+            if reference is not None:
+                errors.append(math.hypot(position[0] - reference[0], position[1] - reference[1]))
+        if errors:
+            error = sum(errors) / len(errors)
+            if best_error is None or error < best_error:
+                best_lag, best_error = lag, error
+    return best_lag
+
+
+def filter_report(rows):
+    raw, filtered = replay_filter(rows)
+    return {
+        "samples": sum(1 for _, position in raw if position is not None),
+        "raw_jitter_px": jitter(raw),
+        "filtered_jitter_px": jitter(filtered),
+        "lag_ms": estimate_lag(raw, filtered) * 1000,
+    }
+
+
+def timed(method, name, samples):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            samples[name].append(time.perf_counter() - start)
+    return wrapper
+
+
+class HeadlessHarness:
+    def __init__(self, trace, dirty_rects=True, seed=0, record_path=None, renderer="surface"):
+        self.trace = trace
+        self.seed = seed
+        self.record_path = record_path
+        self.clock = FixedClock()
+        
+        random.seed(seed)
+        self.game = ElixirGame(use_camera=False, time_source=self.clock, renderer=renderer)
+        self.game.canvas.dirty_rects = dirty_rects
+        self.backend = type(self.game.canvas).__name__
+        
+        self.frame_times = []
+        self.state_times = defaultdict(list)
+        self.method_times = defaultdict(list)
+        for name in TIMED_METHODS:
+            setattr(self.game, name, timed(getattr(self.game, name), name, self.method_times))
+        self.game.canvas.present = timed(self.game.canvas.present, "present", self.method_times)
+
+    def run(self):
+        game = self.game
+        next_sample = 0.0
+        hold = 0
+        rows = []
+        
+        for frame in range(MAX_FRAMES):
+            t = self.clock()
+            if t >= next_sample:
+                position = self.trace.position(game, t)
+                game.publish_finger(position, t - CAMERA_LATENCY, t)
+                rows.append((t, position))
+                next_sample += CAMERA_DT
+            
+            state = game.state
+            start = time.perf_counter()
+            game.step()
+            elapsed = time.perf_counter() - start
+            self.state_times[state.name].append(elapsed)
+            self.frame_times.append(elapsed)
+            
+            if game.state == GameState.END_SUCCESS:
+                hold += 1
+                if hold >= HOLD_FRAMES:
+                    break
+            self.clock.advance(FRAME_DT)
+        
+        if self.record_path:
+            with open(self.record_path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["t", "x", "y"])
+                for t, position in rows:
+                    if position is None:
+                        writer.writerow([f"{t:.4f}", "", ""])
+                    else:
+                        writer.writerow([f"{t:.4f}", f"{position[0]:.1f}", f"{position[1]:.1f}"])
+        
+        game.canvas.close()
+        return {
+            "completed": game.state == GameState.END_SUCCESS,
+            "backend": self.backend,
+            "frames": frame + 1,
+            "game_time_s": self.clock(),
+            "recipe": game.current_recipe_name,
+            "frame": summarize({"frame": self.frame_times})["frame"],
+            "filter": filter_report(rows),
+            "startup": game.startup_times,
+            "states": summarize(self.state_times),
+            "methods": summarize(self.method_times),
+        }
+
+
+def print_filter_report(stats):
+    print(f"  filtr: {stats['samples']} próbek, drgania {stats['raw_jitter_px']:.2f} -> "
+          f"{stats['filtered_jitter_px']:.2f} px, opóźnienie {stats['lag_ms']:.0f} ms")
+
+
+def print_report(name, report):
+    status = "OK" if report["completed"] else "NIE UKOŃCZONO"
+    print(f"== {name}: {status}, {report['backend']}, {report['frames']} klatek, {report['game_time_s']:.1f} s gry, "
+          f"{report['recipe']}")
+    print_filter_report(report["filter"])
+    for section in ("states", "methods"):
+        print(f"  {section}:")
+        for key, stats in report[section].items():
+            print(f"    {key:<26} n={stats['count']:<5} p50={stats['p50_ms']:7.3f} ms"
+                  f"  p95={stats['p95_ms']:7.3f} ms  p99={stats['p99_ms']:7.3f} ms  max={stats['max_ms']:7.3f} ms")
+
+
+def print_comparison(reports):
+    print("== porównanie (cała klatka / present)")
+    for name, report in reports.items():
+        frame = report["frame"]
+        present = report["methods"].get("present", {"p50_ms": 0.0, "p95_ms": 0.0})
+        print(f"  {name:<14} {report['backend']:<16} klatka p50={frame['p50_ms']:7.3f} p95={frame['p95_ms']:7.3f} ms"
+              f"  present p50={present['p50_ms']:7.3f} p95={present['p95_ms']:7.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Odtwarzanie bez okna i pomiar czasu klatek gry ElixirGame")
+    parser.add_argument("--scenario", choices=[name for name, _, _, _ in SUITE],
+                        help="uruchom jeden scenariusz zamiast całego zestawu")
+    parser.add_argument("--trace", help="odtwórz nagrany ślad palca (CSV z kolumnami t,x,y)")
+    parser.add_argument("--record", help="zapisz ślad palca z przebiegu do pliku CSV")
+    parser.add_argument("--filter-only", action="store_true",
+                        help="tylko przepuść ślad z --trace przez filtr palca i podaj drgania oraz opóźnienie")
+    parser.add_argument("--seed", type=int, default=0, help="ziarno losowania przepisu i drgań śladu")
+    parser.add_argument("--json", help="zapisz raport do pliku JSON")
+    args = parser.parse_args()
+
+    if args.filter_only:
+        if not args.trace:
+            parser.error("--filter-only wymaga --trace")
+        print(f"== {args.trace}")
+        print_filter_report(filter_report(RecordedTrace(args.trace).rows()))
+        return
+
+    scenarios = [s for s in SUITE if args.scenario is None or s[0] == args.scenario]
+    if args.trace:
+        scenarios = scenarios[:1] if args.scenario else [
+            ("trace_dirty", None, "surface", True),
+            ("trace_full", None, "surface", False),
+            ("trace_texture", None, "software", False),
+        ]
+
+    reports = {}
+    for name, difficulty, renderer, dirty_rects in scenarios:
+        if args.trace:
+            trace = RecordedTrace(args.trace)
+        else:
+            trace = ScriptedTrace(difficulty, seed=args.seed)
+        harness = HeadlessHarness(trace, dirty_rects=dirty_rects, seed=args.seed, record_path=args.record,
+                                  renderer=renderer)
+        reports[name] = harness.run()
+        print_report(name, reports[name])
+    if len(reports) > 1:
+        print_comparison(reports)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(reports, f, indent=2)
+
+    pygame.quit()
+    if not all(report["completed"] for report in reports.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from main import HandTracker
+
+CHUNK_FRAMES = 300
+LANDMARK_DTYPE = np.float32
+
+
+def probe_video(path):
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Nie można otworzyć pliku wideo: {path}")
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    cap.release()
+    return frame_count, fps
+
+
+def extract_chunk(video_path, output_path, start, stop, fps):
+    landmarks = np.load(output_path, mmap_mode="r+")
+    cap = cv2.VideoCapture(video_path)
+    cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+    tracker = HandTracker()
+
+    processed = 0
+    try:
+        for index in range(start, stop):
+            ret, frame = cap.read()
+            if not ret:
+                break
+            
+            position = tracker.process(frame)
+            if position is None:
+                landmarks[index] = (index / fps, np.nan, np.nan)
+            else:
+                landmarks[index] = (index / fps, position[0], position[1])
+            processed += 1
+    finally:
+        tracker.close()
+        cap.release()
+        landmarks.flush()
+
+    return start, processed
+
+
+def extract(video_path, output_path, workers=None, chunk_frames=CHUNK_FRAMES):
+    frame_count, fps = probe_video(video_path)
+    if frame_count <= 0:
+        raise RuntimeError(f"Nie można ustalić liczby klatek: {video_path}")
+
+    landmarks = np.lib.format.open_memmap(output_path, mode="w+", dtype=LANDMARK_DTYPE, shape=(frame_count, 3))
+    landmarks[:] = np.nan
+    landmarks.flush()
+    del landmarks
+
+    chunks = [(start, min(start + chunk_frames, frame_count)) for start in range(0, frame_count, chunk_frames)]
+    workers = workers or os.cpu_count() or 1
+
+    processed = 0
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+        futures = [pool.submit(extract_chunk, video_path, output_path, start, stop, fps) for start, stop in chunks]
+        for future in futures:
+            start, count = future.result()
+            processed += count
+
+    return frame_count, processed, fps
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Wyodrębnij pozycje palca wskazującego z nagrania do pliku .npy")
+    parser.add_argument("video", help="plik wideo do przetworzenia")
+    parser.add_argument("-o", "--output", help="plik wynikowy (domyślnie <video>.npy)")
+    parser.add_argument("--workers", type=int, default=None, help="liczba procesów (domyślnie liczba rdzeni)")
+    parser.add_argument("--chunk-frames", type=int, default=CHUNK_FRAMES, help="liczba klatek na zadanie")
+    args = parser.parse_args()
+
+    output_path = args.output or os.path.splitext(args.video)[0] + ".npy"
+    start = time.perf_counter()
+    try:
+        frame_count, processed, fps = extract(args.video, output_path, args.workers, args.chunk_frames)
+    except RuntimeError as e:
+        print(e)
+        sys.exit(1)
+
+    elapsed = time.perf_counter() - start
+    print(f"Przetworzono {processed}/{frame_count} klatek ({fps:.1f} FPS) w {elapsed:.1f} s -> {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,236 @@
 import pygame
-import cv2
-import mediapipe as mp
+import numpy as np
 import threading
+import argparse
+import multiprocessing
+from multiprocessing import shared_memory
 import time
 import random
 import sys
 import math
+import os
+import signal
+import mmap
+import struct
+import hashlib
+import json
+import csv
+from collections import OrderedDict, deque, namedtuple
 from enum import Enum
 
+try:
+    from pygame._sdl2 import video as sdl_video
+except ImportError:
+    sdl_video = None
+
 pygame.init()
 
+cv2 = None
+mp = None
+
 SCREEN_WIDTH = 1024
 SCREEN_HEIGHT = 768
 HOVER_TIME = 0.5
 GLOW_DURATION = 1.0
 GLOW_PAUSE = 0.3
+ERROR_DURATION = 2.0
+FPS = 60
+IDLE_FRAME_TIME = 0.25
+INPUT_MOVE_THRESHOLD = 2
+WAKE_EVENT = pygame.USEREVENT + 1
+EXPOSE_EVENTS = (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE, pygame.WINDOWRESTORED)
+GLOW_CACHE_SIZE = 64
+GLOW_INTENSITY_STEPS = 32
+PROGRESS_STEPS = 100
+TEXT_CACHE_SIZE = 128
+ERROR_MESSAGE = "Niestety nie udało się, spróbuj ponownie"
+PLAY_AGAIN_LABEL = "ZAGRAJ PONOWNIE"
+ASSET_CACHE_DIR = ".asset_cache"
+ASSET_CACHE_MAGIC = b"GRA1"
+ASSET_CACHE_HEADER = struct.Struct("<4sIII")
+FRAME_WAIT_TIMEOUT = 0.1
+FILTER_MIN_CUTOFF = 1.0
+FILTER_BETA = 0.01
+FILTER_D_CUTOFF = 1.0
+PREDICTION_MAX_HORIZON = 0.1
+DIRTY_RECTS = True
+RENDER_BACKEND = os.environ.get("GRA_RENDERER", "surface")
+RENDER_BACKENDS = ["surface", "texture", "software"]
+TEXTURE_CACHE_SIZE = 256
+PROFILING = os.environ.get("GRA_PROFILE") == "1"
+PROFILE_BUFFER_SIZE = 600
+PROFILE_EXPORT_BASE = "profile"
+PROFILE_OVERLAY_KEY = pygame.K_F3
+PROFILE_OVERLAY_REFRESH = 15
+RENDER_STAGES = ["events", "input", "timers", "draw", "check_ingredient_clicks", "cursor", "present"]
+CAMERA_STAGES = ["camera_read", "camera_convert", "hands_process", "publish"]
+SHARED_FRAME_SLOTS = 3
+TRACKING_WORKER_TIMEOUT = 2.0
+CAPTURE_WIDTH = 424
+CAPTURE_HEIGHT = 240
+ROI_SIZE = 0.6
+ROI_STABLE_FRAMES = 5
+IDLE_INFERENCE_INTERVAL = 0.25
+FINGER_STALE_TIMEOUT = 1.0
+RECIPES_FILE = "recipes.json"
+TRACKING_STARTING = "starting"
+TRACKING_READY = "ready"
+TRACKING_FAILED = "failed"
+PINCH_ON_RATIO = 0.25
+PINCH_OFF_RATIO = 0.4
+PINCH_DEBOUNCE_FRAMES = 2
+STATION_REPORT_INTERVAL = 5.0
+TELEMETRY_ENABLED = os.environ.get("GRA_TELEMETRY", "1") != "0"
+TELEMETRY_DIR = "telemetry"
+TELEMETRY_QUEUE_SIZE = 4096
+TELEMETRY_FLUSH_INTERVAL = 1.0
+TELEMETRY_MAX_BYTES = 1024 * 1024
+
+def import_tracking_modules():
+    global cv2, mp
+    if cv2 is None:
+        import cv2 as cv2_module
+        cv2 = cv2_module
+    if mp is None:
+        import mediapipe as mp_module
+        mp = mp_module
+
+def create_hands():
+    import_tracking_modules()
+    return mp.solutions.hands.Hands(
+        min_detection_confidence=0.7,
+        min_tracking_confidence=0.7
+    )
+
+def open_camera(index=0):
+    import_tracking_modules()
+    cap = cv2.VideoCapture(index)
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, CAPTURE_WIDTH)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, CAPTURE_HEIGHT)
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    return cap
+
+def find_hand(results, label='Right'):
+    if results.multi_hand_landmarks and results.multi_handedness:
+        for landmarks, handedness in zip(results.multi_hand_landmarks, results.multi_handedness):
+            if handedness.classification[0].label == label:
+                return landmarks.landmark
+    return None
+
+def pinch_ratio(landmarks, w, h):
+    def distance(a, b):
+        return math.hypot((landmarks[a].x - landmarks[b].x) * w, (landmarks[a].y - landmarks[b].y) * h)
+    
+    hand_size = distance(0, 9)
+    if hand_size == 0:
+        return None
+    return distance(4, 8) / hand_size
+
+class PinchDetector:
+    def __init__(self, on_ratio=PINCH_ON_RATIO, off_ratio=PINCH_OFF_RATIO, debounce_frames=PINCH_DEBOUNCE_FRAMES):
+        self.on_ratio = on_ratio
+        self.off_ratio = off_ratio
+        self.debounce_frames = debounce_frames
+        self.pinched = False
+        self.pending = 0
+        self.clicks = 0
+
+    def reset(self):
+        self.pinched = False
+        self.pending = 0
+
+    def update(self, ratio):
+        if ratio is None:
+            self.reset()
+            return False
+        
+        if self.pinched:
+            target = ratio <= self.off_ratio
+        else:
+            target = ratio < self.on_ratio
+        if target == self.pinched:
+            self.pending = 0
+            return False
+        
+        self.pending += 1
+        if self.pending < self.debounce_frames:
+            return False
+        self.pinched = target
+        self.pending = 0
+        if self.pinched:
+            self.clicks += 1
+        return self.pinched
+
+class HandTracker:
+    # Frames are not flipped, so the player's right hand is reported as 'Left'
+    # and x is mirrored when mapping back to screen coordinates.
+    MIRRORED_LABEL = 'Left'
+
+    def __init__(self, hands=None, use_roi=True):
+        import_tracking_modules()
+        self.hands = hands if hands is not None else create_hands()
+        self.use_roi = use_roi
+        self.last_center = None
+        self.stable_frames = 0
+        self.pinch = PinchDetector()
+
+    def roi(self, w, h):
+        if not self.use_roi or self.last_center is None or self.stable_frames < ROI_STABLE_FRAMES:
+            return 0, 0, w, h
+        
+        roi_w = int(w * ROI_SIZE)
+        roi_h = int(h * ROI_SIZE)
+        cx = self.last_center[0] * w
+        cy = self.last_center[1] * h
+        x0 = int(min(max(cx - roi_w / 2, 0), w - roi_w))
+        y0 = int(min(max(cy - roi_h / 2, 0), h - roi_h))
+        return x0, y0, roi_w, roi_h
+
+    def prepare(self, frame):
+        h, w = frame.shape[:2]
+        roi = self.roi(w, h)
+        x0, y0, roi_w, roi_h = roi
+        rgb = cv2.cvtColor(frame[y0:y0 + roi_h, x0:x0 + roi_w], cv2.COLOR_BGR2RGB)
+        return rgb, roi, (w, h)
+
+    def locate(self, results, roi, size, frame=None):
+        landmarks = find_hand(results, self.MIRRORED_LABEL)
+        if landmarks is None and frame is not None and roi != (0, 0) + tuple(size):
+            # A fast hand can leave the crop; look at the whole frame before
+            # reporting it lost so the cursor does not flicker.
+            self.stable_frames = 0
+            rgb, roi, size = self.prepare(frame)
+            landmarks = find_hand(self.hands.process(rgb), self.MIRRORED_LABEL)
+        if landmarks is None:
+            self.last_center = None
+            self.stable_frames = 0
+            self.pinch.reset()
+            return None
+        
+        x0, y0, roi_w, roi_h = roi
+        w, h = size
+        self.pinch.update(pinch_ratio(landmarks, roi_w, roi_h))
+        # The crop follows the palm (wrist to middle knuckle), which moves less
+        # than the fingertip and keeps the whole hand inside the ROI.
+        palm_x = (landmarks[0].x + landmarks[9].x) / 2
+        palm_y = (landmarks[0].y + landmarks[9].y) / 2
+        self.last_center = ((x0 + palm_x * roi_w) / w, (y0 + palm_y * roi_h) / h)
+        self.stable_frames += 1
+        point = landmarks[8]
+        return (1 - (x0 + point.x * roi_w) / w, (y0 + point.y * roi_h) / h)
+
+    def process(self, frame):
+        rgb, roi, size = self.prepare(frame)
+        return self.locate(self.hands.process(rgb), roi, size, frame)
+
+    def warm_up(self, size=(CAPTURE_WIDTH, CAPTURE_HEIGHT)):
+        self.hands.process(np.zeros((size[1], size[0], 3), dtype=np.uint8))
+
+    def close(self):
+        self.hands.close()
+
+def load_landmark_cache(path):
+    return np.load(path, mmap_mode="r")
 
 class GameState(Enum):
     START = 1
@@ -23,63 +239,1292 @@ class GameState(Enum):
     END_SUCCESS = 4
     END_FAILURE = 5
 
-class ElixirGame:
+BACKGROUND_FILES = {
+    "start": "tla/start.png",
+    "difficulty": "tla/trudnosc.png",
+    "easy": "tla/latwy.png",
+    "end": "tla/koniec.png",
+    "failure": "tla/zagraj_ponownie.png"
+}
+
+INGREDIENT_FILES = {
+    "swietlisty_krag": "tla/swietlisty_krag.png",
+    "pazur_smoka": "tla/pazur_smoka.png",
+    "luska_syreny": "tla/luska_syreny.png",
+    "kropla_eliksiru": "tla/kropla_eliksiru.png",
+    "skrzydlo_feniksa": "tla/skrzydlo_feniksa.png",
+    "gwiazda_centralna": "tla/gwiazda_centralna.png"
+}
+
+PLAY_AGAIN_FILE = "tla/zagraj_ponownie.png"
+
+STATE_BACKGROUNDS = {
+    GameState.START: ["start"],
+    GameState.DIFFICULTY: ["difficulty"],
+    GameState.EASY_GAME: ["easy"],
+    GameState.END_SUCCESS: ["end"],
+    GameState.END_FAILURE: ["failure"]
+}
+
+InputSnapshot = namedtuple("InputSnapshot", ["x", "y", "source", "timestamp"])
+
+class RecipeTrieNode:
     def __init__(self):
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("Gra Eliksirów")
+        self.children = {}
+        self.recipes = []
+        self.count = 0
+
+
+class RecipeTrie:
+    def __init__(self):
+        self.root = RecipeTrieNode()
+
+    def add(self, name, sequence):
+        node = self.root
+        node.count += 1
+        for ingredient in sequence:
+            node = node.children.setdefault(ingredient, RecipeTrieNode())
+            node.count += 1
+        node.recipes.append(name)
+
+    def find(self, prefix):
+        node = self.root
+        for ingredient in prefix:
+            node = node.children.get(ingredient)
+            if node is None:
+                return None
+        return node
+
+    def possible(self, prefix):
+        node = self.find(prefix)
+        if node is None:
+            return []
+        
+        names = []
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            names.extend(node.recipes)
+            stack.extend(node.children.values())
+        return names
+
+
+class RecipeCursor:
+    def __init__(self, trie, recipe):
+        self.trie = trie
+        self.recipe = recipe
+        self.reset()
+
+    def reset(self):
+        self.node = self.trie.root
+        self.position = 0
+
+    def advance(self, ingredient):
+        # The node follows what the player actually picked, so possible_count()
+        # tells how many recipes in the pack still start with their sequence.
+        if self.node is not None:
+            self.node = self.node.children.get(ingredient)
+        if self.position >= len(self.recipe) or ingredient != self.recipe[self.position]:
+            return False
+        self.position += 1
+        return True
+
+    def complete(self):
+        return self.position == len(self.recipe)
+
+    def possible_count(self):
+        return self.node.count if self.node is not None else 0
+
+
+class RecipeBook:
+    def __init__(self, packs, ingredients):
+        self.ingredients = list(ingredients)
+        self.recipes = {}
+        self.tries = {}
+        self.generated_lengths = {}
+        
+        for difficulty, pack in packs.items():
+            recipes = []
+            trie = RecipeTrie()
+            for name, sequence in pack.get("recipes", {}).items():
+                sequence = tuple(sequence)
+                unknown = [ingredient for ingredient in sequence if ingredient not in self.ingredients]
+                if unknown:
+                    raise ValueError(f"Nieznane składniki w przepisie {name}: {', '.join(unknown)}")
+                recipes.append((name, sequence))
+                trie.add(name, sequence)
+            
+            self.recipes[difficulty] = recipes
+            self.tries[difficulty] = trie
+            if "generated_length" in pack:
+                self.generated_lengths[difficulty] = int(pack["generated_length"])
+
+    def names(self, limit=None):
+        names = []
+        for recipes in self.recipes.values():
+            for name, _ in recipes:
+                if limit is not None and len(names) >= limit:
+                    return names
+                names.append(name)
+        return names
+
+    def sample(self, difficulty, rng=random):
+        recipes = self.recipes.get(difficulty)
+        if not recipes:
+            return self.generate(self.generated_lengths.get(difficulty, 3), rng)
+        return recipes[rng.randrange(len(recipes))]
+
+    def generate(self, length, rng=random):
+        sequence = []
+        for _ in range(length):
+            choices = [ingredient for ingredient in self.ingredients if not sequence or ingredient != sequence[-1]]
+            sequence.append(rng.choice(choices))
+        return f"Losowy Eliksir ({length} składników)", tuple(sequence)
+
+    def possible(self, difficulty, prefix):
+        return self.tries[difficulty].possible(prefix)
+
+    def cursor(self, difficulty, recipe):
+        return RecipeCursor(self.tries.get(difficulty, RecipeTrie()), recipe)
+
+
+def load_recipe_book(path, ingredients):
+    try:
+        with open(path, encoding="utf-8") as f:
+            packs = json.load(f)
+        return RecipeBook(packs, ingredients)
+    except Exception as e:
+        print(f"Błąd ładowania przepisów: {e}")
+        sys.exit(1)
+
+
+class GlowCache:
+    def __init__(self, max_size=GLOW_CACHE_SIZE, intensity_steps=GLOW_INTENSITY_STEPS):
+        self.max_size = max_size
+        self.intensity_steps = intensity_steps
+        self.sprites = OrderedDict()
+
+    def quantize(self, intensity):
+        intensity = max(0.0, min(1.0, intensity))
+        return round(intensity * self.intensity_steps)
+
+    def get(self, w, h, intensity):
+        key = (w, h, self.quantize(intensity))
+        sprite = self.sprites.get(key)
+        if sprite is not None:
+            self.sprites.move_to_end(key)
+            return sprite
+        
+        sprite = self.build(w, key[2] / self.intensity_steps)
+        self.sprites[key] = sprite
+        if len(self.sprites) > self.max_size:
+            self.sprites.popitem(last=False)
+        return sprite
+
+    def build(self, w, intensity):
+        outer_radius = int((w // 2 + 20) * (1 + 5 * 0.15))
+        sprite = pygame.Surface((outer_radius * 2, outer_radius * 2), pygame.SRCALPHA)
+        
+        for i in range(5, 0, -1):
+            alpha = int(50 * intensity * (i / 5))
+            radius = int((w // 2 + 20) * (1 + i * 0.15))
+            
+            layer = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+            pygame.draw.circle(layer, (255, 255, 150, alpha), (radius, radius), radius)
+            sprite.blit(layer, (outer_radius - radius, outer_radius - radius))
+        
+        return sprite
+
+    def warm(self, rects, intensities):
+        for x, y, w, h in rects:
+            for intensity in intensities:
+                self.get(w, h, intensity)
+
+
+class TextCache:
+    def __init__(self, max_size=TEXT_CACHE_SIZE):
+        self.max_size = max_size
+        self.fonts = {}
+        self.surfaces = OrderedDict()
+
+    def get_font(self, name, size):
+        key = (name, size)
+        font = self.fonts.get(key)
+        if font is None:
+            try:
+                font = pygame.font.Font(name, size)
+            except:
+                font = pygame.font.Font(None, size)
+            self.fonts[key] = font
+        return font
+
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, tuple(color), antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+        
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def warm(self, font, texts, color, antialias=True):
+        for text in texts:
+            self.render(font, text, color, antialias)
+
+
+class ProgressRing:
+    def __init__(self, font, radii=(50, 40), steps=PROGRESS_STEPS):
+        self.steps = steps
+        self.unit_circle = [
+            (math.cos(math.radians(i - 90)), math.sin(math.radians(i - 90)))
+            for i in range(361)
+        ]
+        self.font = font
+        self.glyphs = {}
+        self.frames = {}
+        for radius in radii:
+            self.frames[radius] = [None] * (steps + 1)
+
+    def get_glyph(self, step):
+        glyph = self.glyphs.get(step)
+        if glyph is None:
+            glyph = self.font.render(f"{step}%", True, (255, 255, 255))
+            self.glyphs[step] = glyph
+        return glyph
+
+    def get_frame(self, radius, progress):
+        step = int(max(0.0, min(1.0, progress)) * self.steps)
+        frames = self.frames.setdefault(radius, [None] * (self.steps + 1))
+        frame = frames[step]
+        if frame is None:
+            frame = self.build(radius, step)
+            frames[step] = frame
+        return frame
+
+    def build(self, radius, step):
+        size = radius * 3
+        c = size / 2
+        frame = pygame.Surface((size, size), pygame.SRCALPHA)
+        pygame.draw.circle(frame, (0, 0, 0, 120), (c, c), radius)
+        pygame.draw.circle(frame, (100, 255, 100), (int(c), int(c)), radius, 3)
+        
+        if step > 0:
+            angle = int(step / self.steps * 360)
+            inner = radius - 5
+            points = [(c, c)]
+            points.extend(
+                (c + int(inner * cos), c + int(inner * sin))
+                for cos, sin in self.unit_circle[:angle + 1]
+            )
+            
+            if len(points) > 2:
+                wedge = pygame.Surface((size, size), pygame.SRCALPHA)
+                pygame.draw.polygon(wedge, (100, 255, 100, 180), points)
+                frame.blit(self.premultiply(wedge), (0, 0), special_flags=pygame.BLEND_PREMULTIPLIED)
+            
+            glyph = self.get_glyph(step)
+            frame.blit(self.premultiply(glyph), glyph.get_rect(center=(c, c)),
+                       special_flags=pygame.BLEND_PREMULTIPLIED)
+        
+        return self.unpremultiply(frame)
+
+    # Layers are composited premultiplied so a frame matches drawing them one
+    # by one onto the screen; blits expect straight alpha, so it is undone at
+    # the end. Surface.premul_alpha() is not used because it ignores the row
+    # padding of font surfaces.
+    @staticmethod
+    def premultiply(surface):
+        layer = surface.copy()
+        alpha = pygame.surfarray.pixels_alpha(layer)
+        rgb = pygame.surfarray.pixels3d(layer)
+        rgb[...] = (rgb.astype(np.uint32) * alpha[..., None] + 127) // 255
+        del alpha, rgb
+        return layer
+
+    @staticmethod
+    def unpremultiply(frame):
+        alpha = pygame.surfarray.pixels_alpha(frame)
+        rgb = pygame.surfarray.pixels3d(frame)
+        visible = alpha > 0
+        a = alpha[visible].astype(np.uint32)[:, None]
+        rgb[visible] = np.minimum(255, (rgb[visible].astype(np.uint32) * 255 + a // 2) // a)
+        del alpha, rgb
+        return frame
+
+    def draw(self, surface, center, progress, radius=50):
+        frame = self.get_frame(radius, progress)
+        cx, cy = center
+        half = frame.get_width() // 2
+        surface.blit(frame, (cx - half, cy - half))
+
+
+class OneEuroFilter:
+    def __init__(self, min_cutoff=FILTER_MIN_CUTOFF, beta=FILTER_BETA, d_cutoff=FILTER_D_CUTOFF):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self):
+        self.value = None
+        self.velocity = 0.0
+        self.last_time = None
+
+    @staticmethod
+    def smoothing(cutoff, dt):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def update(self, value, timestamp):
+        if self.value is None:
+            self.value = value
+            self.last_time = timestamp
+            return self.value
+        
+        dt = timestamp - self.last_time
+        if dt <= 0:
+            return self.value
+        
+        raw_velocity = (value - self.value) / dt
+        a_d = self.smoothing(self.d_cutoff, dt)
+        self.velocity = a_d * raw_velocity + (1 - a_d) * self.velocity
+        
+        cutoff = self.min_cutoff + self.beta * abs(self.velocity)
+        a = self.smoothing(cutoff, dt)
+        self.value = a * value + (1 - a) * self.value
+        self.last_time = timestamp
+        return self.value
+
+    def predict(self, timestamp, max_horizon=PREDICTION_MAX_HORIZON):
+        if self.value is None:
+            return None
+        horizon = max(0.0, min(timestamp - self.last_time, max_horizon))
+        return self.value + self.velocity * horizon
+
+
+class FingertipFilter:
+    def __init__(self, min_cutoff=FILTER_MIN_CUTOFF, beta=FILTER_BETA, d_cutoff=FILTER_D_CUTOFF,
+                 max_horizon=PREDICTION_MAX_HORIZON):
+        self.max_horizon = max_horizon
+        self.x = OneEuroFilter(min_cutoff, beta, d_cutoff)
+        self.y = OneEuroFilter(min_cutoff, beta, d_cutoff)
+
+    def reset(self):
+        self.x.reset()
+        self.y.reset()
+
+    def update(self, x, y, timestamp):
+        return self.x.update(x, timestamp), self.y.update(y, timestamp)
+
+    def predict(self, timestamp):
+        px = self.x.predict(timestamp, self.max_horizon)
+        py = self.y.predict(timestamp, self.max_horizon)
+        if px is None or py is None:
+            return None
+        px = max(0, min(SCREEN_WIDTH - 1, int(px)))
+        py = max(0, min(SCREEN_HEIGHT - 1, int(py)))
+        return px, py
+
+
+class TimerScheduler:
+    def __init__(self):
+        self.timers = {}
+
+    def schedule(self, name, due, callback):
+        self.timers[name] = (due, callback)
+
+    def cancel(self, name):
+        self.timers.pop(name, None)
+
+    def next_due(self):
+        return min((due for due, _ in self.timers.values()), default=None)
+
+    def run_due(self, now):
+        while self.timers:
+            name, (due, callback) = min(self.timers.items(), key=lambda item: item[1][0])
+            if due > now:
+                return
+            del self.timers[name]
+            callback(due)
+
+
+class HitRegistry:
+    def __init__(self, scheduler, hover_time=HOVER_TIME):
+        self.scheduler = scheduler
+        self.hover_time = hover_time
+        self.regions = {}
+        self.hovered = None
+        self.hover_start = None
+        self.ready = False
+        self.clicked = False
+        self.timestamp = 0.0
+
+    def add(self, region_id, rect):
+        self.regions[region_id] = rect
+
+    def hit_test(self, x, y, region_ids):
+        for region_id in region_ids:
+            rx, ry, rw, rh = self.regions[region_id]
+            if rx <= x <= rx + rw and ry <= y <= ry + rh:
+                return region_id
+        return None
+
+    def resolve(self, snapshot, region_ids):
+        self.timestamp = snapshot.timestamp
+        hovered = None
+        if snapshot.x is not None and snapshot.y is not None:
+            hovered = self.hit_test(snapshot.x, snapshot.y, region_ids)
+        
+        if hovered != self.hovered:
+            self.hovered = hovered
+            self.ready = False
+            if hovered is None:
+                self.hover_start = None
+                self.scheduler.cancel("dwell")
+            else:
+                self.start_dwell(snapshot.timestamp)
+        return hovered
+
+    def start_dwell(self, start):
+        self.hover_start = start
+        self.clicked = False
+        self.scheduler.schedule("dwell", start + self.hover_time, self.complete_dwell)
+
+    def complete_dwell(self, due):
+        self.ready = True
+
+    def click(self):
+        if self.hovered is None:
+            return False
+        self.scheduler.cancel("dwell")
+        self.ready = True
+        self.clicked = True
+        return True
+
+    def next_change(self, now):
+        if self.hovered is None or self.ready:
+            return None
+        return self.hover_start if now < self.hover_start else now
+
+    def is_hovered(self, region_id):
+        return self.hovered == region_id
+
+    def progress(self, region_id):
+        if self.hovered != region_id or self.hover_start is None:
+            return 0.0
+        elapsed = self.timestamp - self.hover_start
+        return max(0.0, min(elapsed / self.hover_time, 1.0))
+
+    def dwell_time(self):
+        if self.hover_start is None:
+            return 0.0
+        return max(0.0, self.timestamp - self.hover_start)
+
+    def consume_click(self, region_id):
+        if self.hovered != region_id or not self.ready:
+            return False
+        self.ready = False
+        self.start_dwell(self.timestamp + 1)
+        return True
+
+
+class LatestFrame:
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.frame = None
+        self.captured_at = 0.0
+        self.sequence = 0
+        self.dropped = 0
+
+    def put(self, frame, captured_at):
+        with self.condition:
+            if self.frame is not None:
+                self.dropped += 1
+            self.frame = frame
+            self.captured_at = captured_at
+            self.sequence += 1
+            self.condition.notify()
+
+    def take(self, timeout=FRAME_WAIT_TIMEOUT):
+        with self.condition:
+            if self.frame is None:
+                self.condition.wait(timeout)
+            frame = self.frame
+            self.frame = None
+            return frame, self.captured_at
+
+
+class SharedFrameRing:
+    LATEST_SLOT = 0
+    LATEST_SEQUENCE = 1
+    READING_SLOT = 2
+    HEADER_FIELDS = 3
+
+    def __init__(self, shape, slots=SHARED_FRAME_SLOTS, frames_name=None, header_name=None):
+        self.shape = tuple(shape)
+        self.slots = slots
+        frame_bytes = int(np.prod(self.shape))
+        header_size = (self.HEADER_FIELDS + slots) * 8
+        self.owner = frames_name is None
+        
+        if self.owner:
+            self.frames_shm = shared_memory.SharedMemory(create=True, size=frame_bytes * slots)
+            self.header_shm = shared_memory.SharedMemory(create=True, size=header_size)
+        else:
+            self.frames_shm = shared_memory.SharedMemory(name=frames_name)
+            self.header_shm = shared_memory.SharedMemory(name=header_name)
+        
+        self.frames = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=self.frames_shm.buf)
+        self.header = np.ndarray((self.HEADER_FIELDS + slots,), dtype=np.float64, buffer=self.header_shm.buf)
+        if self.owner:
+            self.header[:] = -1
+            self.header[self.LATEST_SEQUENCE] = 0
+
+    def names(self):
+        return self.frames_shm.name, self.header_shm.name
+
+    def write_slot(self):
+        busy = (self.header[self.LATEST_SLOT], self.header[self.READING_SLOT])
+        for slot in range(self.slots):
+            if slot not in busy:
+                return slot
+        return 0
+
+    def publish(self, slot, captured_at):
+        self.header[self.HEADER_FIELDS + slot] = captured_at
+        self.header[self.LATEST_SLOT] = slot
+        self.header[self.LATEST_SEQUENCE] += 1
+
+    def sequence(self):
+        return self.header[self.LATEST_SEQUENCE]
+
+    def acquire_latest(self):
+        while True:
+            slot = int(self.header[self.LATEST_SLOT])
+            if slot < 0:
+                return None, 0.0
+            self.header[self.READING_SLOT] = slot
+            if int(self.header[self.LATEST_SLOT]) == slot:
+                return self.frames[slot], self.header[self.HEADER_FIELDS + slot]
+
+    def release(self):
+        self.header[self.READING_SLOT] = -1
+
+    def close(self):
+        self.frames = None
+        self.header = None
+        if self.owner:
+            self.frames_shm.unlink()
+            self.header_shm.unlink()
+        try:
+            self.frames_shm.close()
+            self.header_shm.close()
+        except BufferError:
+            pass
+
+
+class SharedFingertip:
+    SEQUENCE = 0
+    CAPTURED_AT = 1
+    PROCESSED_AT = 2
+    FOUND = 3
+    X = 4
+    Y = 5
+    INFERENCE_TIME = 6
+    CLICKS = 7
+    FAILED = 8
+    FIELDS = 9
+
+    def __init__(self, name=None):
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=self.FIELDS * 8)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.values = np.ndarray((self.FIELDS,), dtype=np.float64, buffer=self.shm.buf)
+        if self.owner:
+            self.values[:] = 0
+
+    def write(self, position, captured_at, processed_at, inference_time, clicks=0):
+        self.values[self.SEQUENCE] += 1
+        self.values[self.CAPTURED_AT] = captured_at
+        self.values[self.PROCESSED_AT] = processed_at
+        self.values[self.INFERENCE_TIME] = inference_time
+        self.values[self.CLICKS] = clicks
+        if position is None:
+            self.values[self.FOUND] = 0
+        else:
+            self.values[self.FOUND] = 1
+            self.values[self.X] = position[0]
+            self.values[self.Y] = position[1]
+        self.values[self.SEQUENCE] += 1
+
+    def fail(self):
+        self.values[self.FAILED] = 1
+
+    def failed(self):
+        return bool(self.values[self.FAILED])
+
+    def read(self, last_sequence):
+        while True:
+            sequence = self.values[self.SEQUENCE]
+            if sequence == last_sequence:
+                return None
+            if int(sequence) % 2:
+                return None
+            snapshot = self.values.copy()
+            if self.values[self.SEQUENCE] == sequence:
+                return snapshot
+
+    def close(self):
+        self.values = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def tracking_worker(cameras, frame_ready, stop):
+    # Importing main ran pygame.init(), which lets SDL swallow SIGTERM.
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    rings = [SharedFrameRing(shape, frames_name=frames_name, header_name=header_name)
+             for shape, frames_name, header_name, _, _ in cameras]
+    results = [SharedFingertip(result_name) for _, _, _, result_name, _ in cameras]
+    result_ready = [ready for _, _, _, _, ready in cameras]
+    trackers = []
+    
+    try:
+        try:
+            for ring in rings:
+                tracker = HandTracker()
+                trackers.append(tracker)
+                tracker.warm_up((ring.shape[1], ring.shape[0]))
+        except Exception as e:
+            print(f"Nie udało się uruchomić modelu śledzenia dłoni: {e}")
+            for result, ready in zip(results, result_ready):
+                result.fail()
+                ready.set()
+            return
+        
+        last_sequences = [0] * len(rings)
+        while not stop.is_set():
+            if not frame_ready.wait(FRAME_WAIT_TIMEOUT):
+                continue
+            frame_ready.clear()
+            
+            for i, (ring, result, tracker) in enumerate(zip(rings, results, trackers)):
+                if ring.sequence() == last_sequences[i]:
+                    continue
+                last_sequences[i] = ring.sequence()
+                
+                frame, captured_at = ring.acquire_latest()
+                if frame is None:
+                    continue
+                started = time.perf_counter()
+                try:
+                    rgb, roi, size = tracker.prepare(frame)
+                    position = tracker.locate(tracker.hands.process(rgb), roi, size, frame)
+                finally:
+                    ring.release()
+                
+                result.write(position, captured_at, time.monotonic(), time.perf_counter() - started,
+                             tracker.pinch.clicks)
+                result_ready[i].set()
+    finally:
+        for tracker in trackers:
+            tracker.close()
+        for ring in rings:
+            ring.close()
+        for result in results:
+            result.close()
+
+class TrackingPool:
+    def __init__(self, workers=None):
+        if workers is None:
+            workers = max(1, (os.cpu_count() or 2) - 1)
+        self.workers = workers
+        self.context = multiprocessing.get_context("spawn")
+        self.stop = self.context.Event()
+        self.frame_ready = [self.context.Event() for _ in range(workers)]
+        self.cameras = []
+        self.processes = []
+
+    def register(self, shape):
+        camera = len(self.cameras)
+        ring = SharedFrameRing(shape)
+        result = SharedFingertip()
+        result_ready = self.context.Event()
+        self.cameras.append((ring, result, result_ready))
+        return camera, ring, result, self.frame_ready[camera % self.workers], result_ready
+
+    def start(self):
+        for worker in range(min(self.workers, len(self.cameras))):
+            cameras = [
+                (ring.shape, *ring.names(), result.shm.name, result_ready)
+                for ring, result, result_ready in self.cameras[worker::self.workers]
+            ]
+            process = self.context.Process(
+                target=tracking_worker,
+                args=(cameras, self.frame_ready[worker], self.stop),
+                daemon=True
+            )
+            process.start()
+            self.processes.append(process)
+
+    def is_alive(self, camera=None):
+        if camera is None:
+            return any(process.is_alive() for process in self.processes)
+        worker = camera % self.workers
+        return worker < len(self.processes) and self.processes[worker].is_alive()
+
+    def close(self):
+        self.stop.set()
+        for process in self.processes:
+            process.join(timeout=TRACKING_WORKER_TIMEOUT)
+            if process.is_alive():
+                process.terminate()
+        self.processes = []
+        
+        for ring, result, _ in self.cameras:
+            ring.close()
+            result.close()
+        self.cameras = []
+
+
+class FrameRenderer:
+    def __init__(self, screen, dirty_rects=DIRTY_RECTS, update_display=True):
+        self.screen = screen
+        self.offset = screen.get_abs_offset() if screen is not None else (0, 0)
+        self.dirty_rects = dirty_rects
+        self.update_display = update_display
+        self.updated = []
+        self.items = []
+        self.previous = None
+        self.full_redraw = True
+
+    def begin(self):
+        self.items = []
+
+    def invalidate(self):
+        self.full_redraw = True
+
+    def blit(self, surface, dest):
+        w, h = surface.get_size()
+        if isinstance(dest, pygame.Rect):
+            dest = dest.topleft
+        rect = pygame.Rect(int(dest[0]), int(dest[1]), w, h)
+        self.items.append((surface, rect))
+        return rect
+
+    def fill(self, color, rect):
+        rect = pygame.Rect(rect)
+        self.items.append((tuple(color), rect))
+        return rect
+
+    @staticmethod
+    def item_key(item):
+        source, rect = item
+        if isinstance(source, tuple):
+            return (source, tuple(rect))
+        return (id(source), tuple(rect))
+
+    def draw_items(self, clip=None):
+        for source, rect in self.items:
+            if clip is not None and not rect.colliderect(clip):
+                continue
+            if isinstance(source, tuple):
+                self.screen.fill(source, rect)
+            else:
+                self.screen.blit(source, rect)
+
+    def changed_rects(self):
+        previous = {}
+        for item in self.previous:
+            key = self.item_key(item)
+            previous[key] = previous.get(key, 0) + 1
+        
+        dirty = []
+        for item in self.items:
+            key = self.item_key(item)
+            if previous.get(key, 0) > 0:
+                previous[key] -= 1
+            else:
+                dirty.append(item[1])
+        
+        for item in self.previous:
+            key = self.item_key(item)
+            if previous.get(key, 0) > 0:
+                previous[key] -= 1
+                dirty.append(item[1])
+        
+        merged = []
+        for rect in dirty:
+            rect = rect.clip(self.screen.get_rect())
+            if rect.width == 0 or rect.height == 0:
+                continue
+            for i, other in enumerate(merged):
+                if other.colliderect(rect):
+                    merged[i] = other.union(rect)
+                    break
+            else:
+                merged.append(rect)
+        return merged
+
+    def present(self):
+        if not self.dirty_rects or self.full_redraw or self.previous is None:
+            self.draw_items()
+            self.updated = [self.screen.get_rect()]
+            self.full_redraw = False
+        else:
+            self.updated = self.changed_rects()
+            for rect in self.updated:
+                self.screen.set_clip(rect)
+                self.draw_items(rect)
+            self.screen.set_clip(None)
+        
+        if self.offset != (0, 0):
+            self.updated = [rect.move(self.offset) for rect in self.updated]
+        if self.update_display and self.updated:
+            pygame.display.update(self.updated)
+        self.previous = self.items
+
+    def close(self):
+        self.items = []
+        self.previous = None
+
+
+class TextureRenderer(FrameRenderer):
+    def __init__(self, size=(SCREEN_WIDTH, SCREEN_HEIGHT), accelerated=-1, cache_size=TEXTURE_CACHE_SIZE):
+        self.window = sdl_video.Window("Gra Eliksirów", size=size)
+        try:
+            self.renderer = sdl_video.Renderer(self.window, accelerated=accelerated)
+        except sdl_video.error:
+            self.window.destroy()
+            raise
+        self.renderer.logical_size = size
+        self.cache_size = cache_size
+        self.textures = OrderedDict()
+        super().__init__(None, dirty_rects=False)
+
+    def texture(self, surface):
+        key = id(surface)
+        entry = self.textures.get(key)
+        if entry is not None:
+            self.textures.move_to_end(key)
+            return entry[1]
+        
+        texture = sdl_video.Texture.from_surface(self.renderer, surface)
+        self.textures[key] = (surface, texture)
+        if len(self.textures) > self.cache_size:
+            self.textures.popitem(last=False)
+        return texture
+
+    def draw_items(self, clip=None):
+        for source, rect in self.items:
+            if isinstance(source, tuple):
+                self.renderer.draw_color = source
+                self.renderer.fill_rect(rect)
+            else:
+                self.texture(source).draw(dstrect=rect)
+
+    def present(self):
+        self.renderer.draw_color = (0, 0, 0, 255)
+        self.renderer.clear()
+        self.draw_items()
+        self.renderer.present()
+        self.full_redraw = False
+        self.previous = self.items
+
+    def close(self):
+        super().close()
+        self.textures.clear()
+        self.renderer = None
+        self.window.destroy()
+
+
+class StageTimings:
+    def __init__(self, size=PROFILE_BUFFER_SIZE):
+        self.size = size
+        self.durations = [0.0] * size
+        self.ended_at = [0.0] * size
+        self.index = 0
+        self.count = 0
+
+    def add(self, duration, ended_at):
+        self.durations[self.index] = duration
+        self.ended_at[self.index] = ended_at
+        self.index = (self.index + 1) % self.size
+        self.count += 1
+
+    def samples(self):
+        n = min(self.count, self.size)
+        start = (self.index - n) % self.size
+        order = [(start + i) % self.size for i in range(n)]
+        return [(self.ended_at[i], self.durations[i]) for i in order]
+
+    def summary(self):
+        durations = sorted(duration for _, duration in self.samples())
+        if not durations:
+            return {"count": 0, "mean_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+        p95 = durations[max(0, math.ceil(0.95 * len(durations)) - 1)]
+        return {
+            "count": self.count,
+            "mean_ms": sum(durations) / len(durations) * 1000,
+            "p95_ms": p95 * 1000,
+            "max_ms": durations[-1] * 1000
+        }
+
+
+class Profiler:
+    def __init__(self, enabled=PROFILING, size=PROFILE_BUFFER_SIZE):
+        self.enabled = enabled
+        self.stages = {}
+        for stage in RENDER_STAGES + CAMERA_STAGES:
+            self.stages[stage] = StageTimings(size)
+        self.wall_offset = time.time() - time.perf_counter()
+
+    def now(self):
+        if not self.enabled:
+            return 0.0
+        return time.perf_counter()
+
+    def lap(self, stage, since):
+        if not self.enabled:
+            return 0.0
+        now = time.perf_counter()
+        if since:
+            self.stages[stage].add(now - since, now)
+        return now
+
+    def record(self, stage, duration):
+        if self.enabled:
+            self.stages[stage].add(duration, time.perf_counter())
+
+    def has_samples(self):
+        return any(timings.count for timings in self.stages.values())
+
+    def overlay_lines(self):
+        lines = []
+        for stage, timings in self.stages.items():
+            if timings.count:
+                stats = timings.summary()
+                lines.append(f"{stage:<24} {stats['mean_ms']:6.2f} {stats['p95_ms']:6.2f} {stats['max_ms']:6.2f}")
+        return lines
+
+    def export(self, base_path=PROFILE_EXPORT_BASE):
+        summary = {}
+        samples = {}
+        for stage, timings in self.stages.items():
+            summary[stage] = timings.summary()
+            samples[stage] = [
+                [ended_at + self.wall_offset, duration * 1000] for ended_at, duration in timings.samples()
+            ]
+        
+        with open(base_path + ".json", "w") as f:
+            json.dump({"summary": summary, "samples": samples}, f, indent=2)
+        
+        with open(base_path + ".csv", "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["stage", "wall_time", "duration_ms"])
+            for stage, rows in samples.items():
+                for wall_time, duration_ms in rows:
+                    writer.writerow([stage, f"{wall_time:.6f}", f"{duration_ms:.4f}"])
+
+
+class StationStats:
+    def __init__(self, size=PROFILE_BUFFER_SIZE):
+        self.frame = StageTimings(size)
+        self.inference = StageTimings(size)
+        self.latency = StageTimings(size)
+        self.frames = 0
+        self.updates = 0
+        self.since = time.perf_counter()
+
+    def add_frame(self, duration):
+        self.frame.add(duration, time.perf_counter())
+        self.frames += 1
+
+    def add_tracking(self, captured_at, processed_at, inference_time):
+        now = time.perf_counter()
+        self.inference.add(inference_time, now)
+        self.latency.add(processed_at - captured_at, now)
+        self.updates += 1
+
+    def report(self):
+        now = time.perf_counter()
+        elapsed = max(now - self.since, 1e-6)
+        report = {
+            "fps": self.frames / elapsed,
+            "tracking_rate": self.updates / elapsed,
+            "frame": self.frame.summary(),
+            "inference": self.inference.summary(),
+            "latency": self.latency.summary()
+        }
+        self.frames = 0
+        self.updates = 0
+        self.since = now
+        return report
+
+
+class TelemetryWriter:
+    def __init__(self, directory=TELEMETRY_DIR, enabled=TELEMETRY_ENABLED, max_queue=TELEMETRY_QUEUE_SIZE,
+                 flush_interval=TELEMETRY_FLUSH_INTERVAL, max_bytes=TELEMETRY_MAX_BYTES):
+        self.directory = directory
+        self.enabled = enabled
+        self.max_queue = max_queue
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.queue = deque()
+        self.dropped = 0
+        self.reported_dropped = 0
+        self.run_id = time.strftime("%Y%m%d-%H%M%S")
+        self.file = None
+        self.file_index = 0
+        self.stop = threading.Event()
+        self.thread = None
+        if enabled:
+            self.thread = threading.Thread(target=self.writer_loop, daemon=True)
+            self.thread.start()
+
+    def record(self, event, **fields):
+        if not self.enabled:
+            return
+        if len(self.queue) >= self.max_queue:
+            self.dropped += 1
+            return
+        self.queue.append((time.time(), event, fields))
+
+    def writer_loop(self):
+        while not self.stop.wait(self.flush_interval):
+            self.write_pending()
+        self.write_pending()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def write_pending(self):
+        lines = []
+        while True:
+            try:
+                wall_time, event, fields = self.queue.popleft()
+            except IndexError:
+                break
+            record = {"t": round(wall_time, 3), "event": event}
+            record.update(fields)
+            lines.append(json.dumps(record, ensure_ascii=False))
+        
+        dropped = self.dropped
+        if dropped > self.reported_dropped:
+            lines.append(json.dumps({"t": round(time.time(), 3), "event": "dropped",
+                                     "count": dropped - self.reported_dropped}))
+            self.reported_dropped = dropped
+        if not lines:
+            return
+        
+        data = ("\n".join(lines) + "\n").encode("utf-8")
+        try:
+            f = self.current_file(len(data))
+            f.write(data)
+            f.flush()
+        except OSError:
+            pass
+
+    def current_file(self, incoming):
+        if self.file is not None and self.file.tell() + incoming > self.max_bytes:
+            self.file.close()
+            self.file = None
+        if self.file is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self.file_index += 1
+            path = os.path.join(self.directory, f"session-{self.run_id}-{self.file_index:03d}.jsonl")
+            self.file = open(path, "ab")
+        return self.file
+
+    def close(self):
+        if self.thread is None:
+            return
+        self.stop.set()
+        self.thread.join()
+        self.thread = None
+
+
+class AssetManager:
+    def __init__(self, cache_dir=ASSET_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.surfaces = {}
+
+    def cache_path(self, path, size):
+        stat = os.stat(path)
+        key = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}|{size[0]}x{size[1]}"
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+        name = os.path.splitext(os.path.basename(path))[0]
+        return os.path.join(self.cache_dir, f"{name}_{size[0]}x{size[1]}_{digest}.raw")
+
+    def read_cache(self, cache_path):
+        try:
+            with open(cache_path, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        
+        view = None
+        raw = None
+        try:
+            magic, w, h, bpp = ASSET_CACHE_HEADER.unpack_from(mm, 0)
+            if (magic != ASSET_CACHE_MAGIC or bpp not in (3, 4) or
+                    len(mm) != ASSET_CACHE_HEADER.size + w * h * bpp):
+                return None
+            
+            fmt = "RGBA" if bpp == 4 else "RGB"
+            view = memoryview(mm)[ASSET_CACHE_HEADER.size:]
+            raw = pygame.image.frombuffer(view, (w, h), fmt)
+            return raw.convert_alpha() if bpp == 4 else raw.convert()
+        except (struct.error, pygame.error, ValueError):
+            # A truncated or corrupt file is just a miss; load() decodes the
+            # source again and rewrites it.
+            return None
+        finally:
+            del raw
+            if view is not None:
+                view.release()
+            mm.close()
+
+    def write_cache(self, cache_path, surface, has_alpha):
+        fmt = "RGBA" if has_alpha else "RGB"
+        w, h = surface.get_size()
+        data = pygame.image.tostring(surface, fmt)
+        tmp_path = cache_path + ".tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(ASSET_CACHE_HEADER.pack(ASSET_CACHE_MAGIC, w, h, len(fmt)))
+                f.write(data)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass
+
+    def load(self, path, size=None):
+        key = (path, size)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            return surface
+        
+        cache_path = self.cache_path(path, size) if size is not None else None
+        if cache_path is not None:
+            surface = self.read_cache(cache_path)
+        
+        if surface is None:
+            source = pygame.image.load(path)
+            has_alpha = bool(source.get_flags() & pygame.SRCALPHA)
+            if size is not None:
+                source = pygame.transform.scale(source, size)
+                self.write_cache(cache_path, source, has_alpha)
+            surface = source.convert_alpha() if has_alpha else source.convert()
+        
+        self.surfaces[key] = surface
+        return surface
+
+
+class GameResources:
+    def __init__(self):
+        self.assets = AssetManager()
+        self.glow_cache = GlowCache()
+        self.text_cache = TextCache()
+        self.progress_ring = ProgressRing(self.text_cache.get_font(None, 32))
+        self.recipe_book = load_recipe_book(RECIPES_FILE, INGREDIENT_FILES)
+
+
+class ElixirGame:
+    def __init__(self, use_camera=True, time_source=time.monotonic, landmark_cache=None, tracking_process=False,
+                 screen=None, resources=None, camera_index=0, tracking_pool=None, telemetry=None,
+                 renderer=RENDER_BACKEND):
+        self.created_at = time.perf_counter()
+        self.startup_times = {}
+        self.startup_reported = False
+        if screen is None:
+            self.canvas = self.create_canvas(renderer)
+        else:
+            self.screen = screen
+            self.canvas = FrameRenderer(self.screen, update_display=False)
+        self.resources = resources if resources is not None else GameResources()
         
         self.clock = pygame.time.Clock()
+        self.now = time_source
         self.state = GameState.START
         
-        self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(
-            min_detection_confidence=0.7,
-            min_tracking_confidence=0.7
-        )
-        self.cap = cv2.VideoCapture(0)
-        
         self.finger_x = None
         self.finger_y = None
+        self.finger_captured_at = None
+        self.finger_processed_at = None
         self.finger_lock = threading.Lock()
+        self.finger_filter = FingertipFilter()
+        self.pinch_clicks = 0
+        self.pinch_pending = False
+        self.render_time = None
+        self.drawn_state = None
+        self.input = InputSnapshot(None, None, None, self.now())
+        self.input_moved = True
+        self.waiting_for_input = False
         
         self.mouse_x = None
         self.mouse_y = None
         
-        self.camera_thread = threading.Thread(target=self.camera_loop, daemon=True)
-        self.camera_running = True
-        self.camera_thread.start()
+        self.profiler = Profiler()
+        self.stats = None
+        self.telemetry = telemetry if telemetry is not None else TelemetryWriter()
+        self.owns_telemetry = telemetry is None
+        self.session_count = 0
+        self.session_errors = 0
+        self.game_started_at = 0.0
+        self.overlay_visible = False
+        self.overlay_font = None
+        self.overlay_surface = None
+        self.overlay_age = 0
+        
+        self.cap = None
+        self.camera_index = camera_index
+        self.camera_running = False
+        self.input_threads = []
+        self.tracking_process = tracking_process or tracking_pool is not None
+        self.tracking_pool = tracking_pool
+        self.owns_tracking_pool = False
+        self.tracking_result = None
+        self.tracking_camera = None
+        self.tracking_sequence = 0
+        self.tracking_values = None
+        self.inference_interval = 0.0
+        self.last_inference_frame_at = float("-inf")
+        self.startup_thread = None
+        self.startup_lock = threading.Lock()
+        self.camera_stopping = False
+        self.tracking_status = TRACKING_STARTING
+        if landmark_cache is not None:
+            self.start_replay(landmark_cache)
+        elif use_camera and tracking_pool is None:
+            self.startup_thread = threading.Thread(target=self.start_camera_background, daemon=True)
+            self.startup_thread.start()
+        elif use_camera:
+            self.start_camera()
+        else:
+            self.tracking_status = TRACKING_READY
+            self.startup_reported = True
         
-        self.hover_start_time = {}
+        self.scheduler = TimerScheduler()
+        self.hit_regions = HitRegistry(self.scheduler)
+        self.glow_cache = self.resources.glow_cache
+        self.text_cache = self.resources.text_cache
+        self.progress_ring = self.resources.progress_ring
+        self.build_cursor_sprites()
         
         self.load_assets()
         
-        self.recipes_easy = {
-            "Eliksir Smoczej Łuski": ["pazur_smoka", "skrzydlo_feniksa", "kropla_eliksiru"],
-            "Mikstura Gwiezdnej Iskry": ["swietlisty_krag", "kropla_eliksiru", "skrzydlo_feniksa"],
-            "Wywar Feniksa": ["skrzydlo_feniksa", "pazur_smoka", "swietlisty_krag"],
-            "Napój Syreniego Głosu": ["luska_syreny", "kropla_eliksiru", "swietlisty_krag"],
-            "Esencja Gwiazdozbioru": ["gwiazda_centralna", "swietlisty_krag", "skrzydlo_feniksa"],
-            "Eliksir Wiecznego Płomienia": ["pazur_smoka", "kropla_eliksiru", "gwiazda_centralna"],
-            "Tonik Magicznego Światła": ["swietlisty_krag", "gwiazda_centralna", "luska_syreny"],
-            "Mikstura Smokołuski": ["luska_syreny", "pazur_smoka", "skrzydlo_feniksa"],
-            "Wywar Niebiańskiego Piórka": ["skrzydlo_feniksa", "gwiazda_centralna", "kropla_eliksiru"],
-            "Eliksir Morskiej Gwiazdy": ["gwiazda_centralna", "luska_syreny", "pazur_smoka"]
-        }
-        
-        self.recipes_hard = {
-            "Potężny Eliksir Smoczej Łuski": ["pazur_smoka", "skrzydlo_feniksa", "kropla_eliksiru", "gwiazda_centralna", "luska_syreny", "swietlisty_krag"],
-            "Arcymikstura Gwiezdnej Iskry": ["swietlisty_krag", "kropla_eliksiru", "skrzydlo_feniksa", "gwiazda_centralna", "luska_syreny", "pazur_smoka"],
-            "Mistyczny Wywar Feniksa": ["skrzydlo_feniksa", "pazur_smoka", "swietlisty_krag", "kropla_eliksiru", "gwiazda_centralna", "luska_syreny"],
-            "Pradawny Napój Syreniego Głosu": ["luska_syreny", "kropla_eliksiru", "swietlisty_krag", "pazur_smoka", "skrzydlo_feniksa", "gwiazda_centralna"],
-            "Kosmiczna Esencja Gwiazdozbioru": ["gwiazda_centralna", "swietlisty_krag", "skrzydlo_feniksa", "kropla_eliksiru", "pazur_smoka", "luska_syreny"],
-            "Wieczny Eliksir Płomienia": ["pazur_smoka", "kropla_eliksiru", "gwiazda_centralna", "skrzydlo_feniksa", "luska_syreny", "swietlisty_krag"],
-            "Olśniewający Tonik Światła": ["swietlisty_krag", "gwiazda_centralna", "luska_syreny", "kropla_eliksiru", "skrzydlo_feniksa", "pazur_smoka"],
-            "Legendarny Wywar Smokołuski": ["luska_syreny", "pazur_smoka", "skrzydlo_feniksa", "swietlisty_krag", "gwiazda_centralna", "kropla_eliksiru"],
-            "Niebiański Nektar Piórka": ["skrzydlo_feniksa", "gwiazda_centralna", "kropla_eliksiru", "luska_syreny", "swietlisty_krag", "pazur_smoka"],
-            "Transcendentny Eliksir Morza": ["gwiazda_centralna", "luska_syreny", "pazur_smoka", "swietlisty_krag", "kropla_eliksiru", "skrzydlo_feniksa"]
-        }
+        self.recipe_book = self.resources.recipe_book
         
         self.current_recipe = None
+        self.recipe_cursor = None
         self.current_recipe_name = None
         self.current_difficulty = None
         self.sequence_playing = False
@@ -105,403 +1550,946 @@ class ElixirGame:
             "play_again_success": (362, 650, 300, 80),
             "play_again_failure": (362, 400, 300, 80)
         }
+        
+        for ingredient, rect in self.ingredient_positions.items():
+            self.hit_regions.add(f"ingredient_{ingredient}", rect)
+        for button_id, rect in self.button_positions.items():
+            self.hit_regions.add(button_id, rect)
+        
+        self.glow_cache.warm(
+            list(self.ingredient_positions.values()) + list(self.button_positions.values()),
+            (0.7, 0.8)
+        )
+        
+        self.text_cache.warm(self.title_font, self.recipe_book.names(TEXT_CACHE_SIZE // 2), (255, 255, 255))
+        self.text_cache.warm(self.error_font, [ERROR_MESSAGE], (255, 0, 0))
+        self.text_cache.warm(self.error_font, [PLAY_AGAIN_LABEL], (255, 255, 255))
+
+    def create_canvas(self, backend):
+        if backend != "surface":
+            if sdl_video is None:
+                print("Renderer tekstur niedostępny w tej wersji pygame, używam powierzchni")
+            else:
+                try:
+                    pygame.display.set_mode((1, 1), pygame.HIDDEN)
+                    canvas = TextureRenderer(accelerated=0 if backend == "software" else -1)
+                    self.screen = None
+                    return canvas
+                except (pygame.error, sdl_video.error) as e:
+                    print(f"Renderer tekstur niedostępny ({e}), używam powierzchni")
+        
+        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        pygame.display.set_caption("Gra Eliksirów")
+        return FrameRenderer(self.screen)
 
     def load_assets(self):
+        self.assets = self.resources.assets
+        self.backgrounds = {}
+        self.ingredients = {}
+        self.play_again_button = None
+        self.loaded_states = set()
+        
+        self.title_font = self.text_cache.get_font("arial.ttf", 36)
+        self.error_font = self.text_cache.get_font("arial.ttf", 24)
+        
+        self.load_state_assets(self.state)
+
+    def load_state_assets(self, state):
+        if state in self.loaded_states:
+            return
+        
         try:
-            self.backgrounds = {
-                "start": pygame.image.load("tla/start.png"),
-                "difficulty": pygame.image.load("tla/trudnosc.png"),
-                "easy": pygame.image.load("tla/latwy.png"),
-                "end": pygame.image.load("tla/koniec.png"),
-                "failure": pygame.image.load("tla/zagraj_ponownie.png")
-            }
-            
-            self.ingredients = {
-                "swietlisty_krag": pygame.image.load("tla/swietlisty_krag.png"),
-                "pazur_smoka": pygame.image.load("tla/pazur_smoka.png"),
-                "luska_syreny": pygame.image.load("tla/luska_syreny.png"),
-                "kropla_eliksiru": pygame.image.load("tla/kropla_eliksiru.png"),
-                "skrzydlo_feniksa": pygame.image.load("tla/skrzydlo_feniksa.png"),
-                "gwiazda_centralna": pygame.image.load("tla/gwiazda_centralna.png")
-            }
-            
-            for key in self.ingredients:
-                self.ingredients[key] = pygame.transform.scale(self.ingredients[key], (120, 120))
+            for key in STATE_BACKGROUNDS[state]:
+                self.backgrounds[key] = self.assets.load(BACKGROUND_FILES[key], (SCREEN_WIDTH, SCREEN_HEIGHT))
             
-            self.play_again_button = pygame.image.load("tla/zagraj_ponownie.png")
-            
-            for key in self.backgrounds:
-                self.backgrounds[key] = pygame.transform.scale(self.backgrounds[key], (SCREEN_WIDTH, SCREEN_HEIGHT))
-            
-            try:
-                self.title_font = pygame.font.Font("arial.ttf", 36)
-                self.error_font = pygame.font.Font("arial.ttf", 24)
-            except:
-                self.title_font = pygame.font.Font(None, 36)
-                self.error_font = pygame.font.Font(None, 24)
-                
+            if state == GameState.EASY_GAME:
+                for key, path in INGREDIENT_FILES.items():
+                    self.ingredients[key] = self.assets.load(path, (120, 120))
+            elif state == GameState.END_SUCCESS:
+                self.play_again_button = self.assets.load(PLAY_AGAIN_FILE)
         except Exception as e:
             print(f"Błąd ładowania zasobów: {e}")
             sys.exit(1)
+        
+        self.loaded_states.add(state)
 
-    def camera_loop(self):
+    def start_camera_background(self):
+        try:
+            self.start_camera()
+        except Exception as e:
+            self.fail_tracking(e)
+
+    def fail_tracking(self, reason):
+        print(f"Śledzenie dłoni niedostępne: {reason}")
+        with self.finger_lock:
+            self.finger_x = None
+            self.finger_y = None
+            self.finger_filter.reset()
+            self.pinch_pending = False
+        self.tracking_status = TRACKING_FAILED
+        if self.waiting_for_input:
+            self.waiting_for_input = False
+            pygame.event.post(pygame.event.Event(WAKE_EVENT))
+
+    def start_camera(self):
+        if self.tracking_process:
+            self.start_tracking_process()
+            return
+        
+        tracker = HandTracker()
+        tracker.warm_up()
+        cap = self.open_capture()
+        with self.startup_lock:
+            if self.camera_stopping:
+                cap.release()
+                tracker.close()
+                return
+            self.tracker = tracker
+            self.cap = cap
+            self.latest_frame = LatestFrame()
+            self.capture_thread = threading.Thread(target=self.capture_loop, daemon=True)
+            self.camera_thread = threading.Thread(target=self.camera_loop, daemon=True)
+            self.input_threads = [self.capture_thread, self.camera_thread]
+            self.camera_running = True
+            self.capture_thread.start()
+            self.camera_thread.start()
+
+    def open_capture(self):
+        cap = open_camera(self.camera_index)
+        if not cap.isOpened():
+            cap.release()
+            raise RuntimeError(f"nie można otworzyć kamery {self.camera_index}")
+        return cap
+
+    def start_tracking_process(self):
+        cap = self.open_capture()
+        ret, frame = cap.read()
+        if ret:
+            shape = frame.shape
+        else:
+            shape = (int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), 3)
+        
+        with self.startup_lock:
+            # stop_camera only waits briefly for a slow camera open; if it has
+            # already given up, this thread cleans up after itself.
+            if self.camera_stopping:
+                cap.release()
+                return
+            self.cap = cap
+            if self.tracking_pool is None:
+                self.tracking_pool = TrackingPool(workers=1)
+                self.owns_tracking_pool = True
+            (self.tracking_camera, self.frame_ring, self.tracking_result, self.frame_ready,
+             self.result_ready) = self.tracking_pool.register(shape)
+            if self.owns_tracking_pool:
+                self.tracking_pool.start()
+            
+            self.capture_thread = threading.Thread(target=self.shared_capture_loop, daemon=True)
+            self.tracking_thread = threading.Thread(target=self.tracking_wake_loop, daemon=True)
+            self.input_threads = [self.capture_thread, self.tracking_thread]
+            self.camera_running = True
+            self.capture_thread.start()
+            self.tracking_thread.start()
+
+    def shared_capture_loop(self):
+        ring = self.frame_ring
         while self.camera_running:
-            ret, frame = self.cap.read()
+            t = self.profiler.now()
+            slot = ring.write_slot()
+            ret, frame = self.cap.read(ring.frames[slot])
             if not ret:
+                time.sleep(0.01)
+                continue
+            if frame is not ring.frames[slot]:
+                if frame.shape != ring.shape:
+                    continue
+                ring.frames[slot][:] = frame
+            
+            captured_at = self.now()
+            if not self.should_infer(captured_at):
                 continue
+            
+            ring.publish(slot, captured_at)
+            self.frame_ready.set()
+            self.profiler.lap("camera_read", t)
+
+    def tracking_wake_loop(self):
+        # Results are read once per frame in update_input. This thread only
+        # blocks on the worker's signal and wakes a loop idling in
+        # wait_for_input when the finger moved, clicked or tracking stopped.
+        while self.camera_running and self.tracking_status != TRACKING_FAILED:
+            if self.result_ready.wait(FRAME_WAIT_TIMEOUT):
+                self.result_ready.clear()
+            if self.waiting_for_input and self.tracking_changed():
+                self.waiting_for_input = False
+                pygame.event.post(pygame.event.Event(WAKE_EVENT))
+
+    def tracking_changed(self):
+        if self.tracking_result.failed():
+            return True
+        if self.tracking_pool.processes and not self.tracking_pool.is_alive(self.tracking_camera):
+            return True
+        
+        values = self.tracking_result.read(self.tracking_sequence)
+        if values is None:
+            return False
+        last = self.tracking_values
+        if (last is None or values[SharedFingertip.FOUND] != last[SharedFingertip.FOUND] or
+                values[SharedFingertip.CLICKS] != last[SharedFingertip.CLICKS]):
+            return True
+        return bool(values[SharedFingertip.FOUND]) and (
+            abs(values[SharedFingertip.X] - last[SharedFingertip.X]) * SCREEN_WIDTH > INPUT_MOVE_THRESHOLD or
+            abs(values[SharedFingertip.Y] - last[SharedFingertip.Y]) * SCREEN_HEIGHT > INPUT_MOVE_THRESHOLD)
+
+    def poll_tracking_result(self):
+        values = self.tracking_result.read(self.tracking_sequence)
+        if values is None:
+            if self.tracking_status == TRACKING_FAILED:
+                return
+            if self.tracking_result.failed():
+                self.fail_tracking("nie udało się uruchomić modelu w procesie śledzenia")
+            elif self.tracking_pool.processes and not self.tracking_pool.is_alive(self.tracking_camera):
+                self.fail_tracking("proces śledzenia zakończył się")
+            return
+        
+        self.tracking_sequence = values[SharedFingertip.SEQUENCE]
+        self.tracking_values = values
+        position = None
+        if values[SharedFingertip.FOUND]:
+            position = (values[SharedFingertip.X] * SCREEN_WIDTH, values[SharedFingertip.Y] * SCREEN_HEIGHT)
+        self.publish_finger(position, values[SharedFingertip.CAPTURED_AT], values[SharedFingertip.PROCESSED_AT],
+                            values[SharedFingertip.CLICKS])
+        self.profiler.record("hands_process", values[SharedFingertip.INFERENCE_TIME])
+        if self.stats is not None:
+            self.stats.add_tracking(values[SharedFingertip.CAPTURED_AT], values[SharedFingertip.PROCESSED_AT],
+                                    values[SharedFingertip.INFERENCE_TIME])
+
+    def start_replay(self, path, loop=True):
+        self.replay_landmarks = load_landmark_cache(path)
+        self.replay_loop_enabled = loop
+        self.replay_thread = threading.Thread(target=self.replay_loop, daemon=True)
+        self.input_threads = [self.replay_thread]
+        self.camera_running = True
+        self.replay_thread.start()
+
+    def replay_loop(self):
+        landmarks = self.replay_landmarks
+        if len(landmarks) == 0:
+            return
+        
+        while self.camera_running:
+            started_at = self.now()
+            for t, x, y in landmarks:
+                if not self.camera_running:
+                    return
+                if math.isnan(t):
+                    continue
+                
+                delay = started_at + float(t) - self.now()
+                if delay > 0:
+                    time.sleep(delay)
                 
-            frame = cv2.flip(frame, 1)
-            h, w, _ = frame.shape
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                position = None
+                if not (math.isnan(x) or math.isnan(y)):
+                    position = (float(x) * SCREEN_WIDTH, float(y) * SCREEN_HEIGHT)
+                self.publish_finger(position, started_at + float(t), self.now())
             
-            results = self.hands.process(rgb)
+            if not self.replay_loop_enabled:
+                self.publish_finger(None, self.now(), self.now())
+                return
+
+    def should_infer(self, captured_at):
+        if captured_at - self.last_inference_frame_at < self.inference_interval:
+            return False
+        self.last_inference_frame_at = captured_at
+        return True
+
+    def capture_loop(self):
+        try:
+            while self.camera_running:
+                t = self.profiler.now()
+                ret, frame = self.cap.read()
+                if not ret:
+                    time.sleep(0.01)
+                    continue
+                
+                captured_at = self.now()
+                if not self.should_infer(captured_at):
+                    continue
+                
+                self.latest_frame.put(frame, captured_at)
+                self.profiler.lap("camera_read", t)
+        except Exception as e:
+            self.fail_tracking(e)
+
+    def camera_loop(self):
+        try:
+            while self.camera_running:
+                frame, captured_at = self.latest_frame.take()
+                if frame is None:
+                    continue
+                
+                t = self.profiler.now()
+                rgb, roi, size = self.tracker.prepare(frame)
+                t = self.profiler.lap("camera_convert", t)
+                
+                results = self.tracker.hands.process(rgb)
+                t = self.profiler.lap("hands_process", t)
+                
+                position = self.tracker.locate(results, roi, size, frame)
+                if position is not None:
+                    position = (position[0] * SCREEN_WIDTH, position[1] * SCREEN_HEIGHT)
+                
+                self.publish_finger(position, captured_at, self.now(), self.tracker.pinch.clicks)
+                self.profiler.lap("publish", t)
+        except Exception as e:
+            self.fail_tracking(e)
+
+    def publish_finger(self, position, captured_at, processed_at, clicks=None):
+        if self.tracking_status != TRACKING_READY:
+            self.startup_times["tracking_s"] = time.perf_counter() - self.created_at
+            self.tracking_status = TRACKING_READY
+        
+        click = clicks is not None and clicks > self.pinch_clicks
+        with self.finger_lock:
+            self.finger_captured_at = captured_at
+            self.finger_processed_at = processed_at
+            if click:
+                self.pinch_clicks = clicks
+                self.pinch_pending = position is not None
             
-            with self.finger_lock:
+            if position is None:
                 self.finger_x = None
                 self.finger_y = None
-                
-                if results.multi_hand_landmarks and results.multi_handedness:
-                    for landmarks, handedness in zip(results.multi_hand_landmarks, results.multi_handedness):
-                        if handedness.classification[0].label == 'Right':
-                            point = landmarks.landmark[8]
-                            self.finger_x = int(point.x * SCREEN_WIDTH)
-                            self.finger_y = int(point.y * SCREEN_HEIGHT)
-                            break
-            
-            time.sleep(1/30)
+                self.finger_filter.reset()
+            else:
+                fx, fy = self.finger_filter.update(position[0], position[1], captured_at)
+                self.finger_x = int(fx)
+                self.finger_y = int(fy)
+        
+        if self.waiting_for_input:
+            previous = self.input if self.input.source == "finger" else InputSnapshot(None, None, None, 0.0)
+            current = InputSnapshot(self.finger_x, self.finger_y, "finger", processed_at)
+            if click or self.has_moved(previous, current):
+                self.waiting_for_input = False
+                pygame.event.post(pygame.event.Event(WAKE_EVENT))
 
-    def is_hovering(self, rect):
-        check_x = None
-        check_y = None
+    def stop_camera(self):
+        if self.startup_thread is not None:
+            self.startup_thread.join(timeout=1.0)
+            self.startup_thread = None
+        with self.startup_lock:
+            self.camera_stopping = True
+        self.camera_running = False
+        for thread in self.input_threads:
+            thread.join(timeout=1.0)
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+        for thread in self.input_threads:
+            thread.join(timeout=1.0)
+        self.input_threads = []
         
+        if self.tracking_result is not None:
+            if self.owns_tracking_pool:
+                self.tracking_pool.close()
+                self.tracking_pool = None
+                self.owns_tracking_pool = False
+            self.frame_ring = None
+            self.tracking_result = None
+        if self.owns_telemetry:
+            self.telemetry.close()
+
+    def get_finger_position(self):
+        render_time = self.render_time if self.render_time is not None else self.now()
         with self.finger_lock:
-            if self.finger_x is not None and self.finger_y is not None:
-                check_x = self.finger_x
-                check_y = self.finger_y
+            if self.finger_x is None or self.finger_y is None:
+                return None
+            # A camera that stopped delivering frames must not leave the cursor
+            # parked over a button, where dwell would keep clicking it.
+            if render_time - self.finger_captured_at > FINGER_STALE_TIMEOUT:
+                return None
+            return self.finger_filter.predict(render_time)
+
+    def take_input_snapshot(self):
+        timestamp = self.now()
+        self.render_time = timestamp
         
-        if check_x is None and self.mouse_x is not None:
-            check_x = self.mouse_x
-            check_y = self.mouse_y
+        position = self.get_finger_position()
+        if position is not None:
+            return InputSnapshot(position[0], position[1], "finger", timestamp)
+        if self.mouse_x is not None and self.mouse_y is not None:
+            return InputSnapshot(self.mouse_x, self.mouse_y, "mouse", timestamp)
+        return InputSnapshot(None, None, None, timestamp)
+
+    def active_regions(self):
+        if self.state == GameState.START:
+            return ["start"]
+        if self.state == GameState.DIFFICULTY:
+            return ["easy", "hard"]
+        if self.state == GameState.EASY_GAME:
+            if self.sequence_playing or self.showing_error:
+                return []
+            return [f"ingredient_{ingredient}" for ingredient in self.ingredient_positions]
+        if self.state == GameState.END_SUCCESS:
+            return ["play_again_success"]
+        if self.state == GameState.END_FAILURE:
+            return ["play_again_failure"]
+        return []
+
+    def update_input(self):
+        if self.tracking_result is not None:
+            self.poll_tracking_result()
+        previous = self.input
+        self.input = self.take_input_snapshot()
+        self.input_moved = self.has_moved(previous, self.input)
         
-        if check_x is None or check_y is None:
+        regions = self.active_regions()
+        self.inference_interval = 0.0 if regions else IDLE_INFERENCE_INTERVAL
+        self.hit_regions.resolve(self.input, regions)
+        if self.take_pinch() and self.input.source == "finger" and self.hit_regions.click():
+            self.input_moved = True
+
+    def take_pinch(self):
+        with self.finger_lock:
+            pending = self.pinch_pending
+            self.pinch_pending = False
+        return pending
+
+    @staticmethod
+    def has_moved(previous, current):
+        if (previous.x is None) != (current.x is None):
+            return True
+        if current.x is None:
             return False
-            
-        x, y, w, h = rect
-        return x <= check_x <= x + w and y <= check_y <= y + h
+        return (abs(current.x - previous.x) > INPUT_MOVE_THRESHOLD or
+                abs(current.y - previous.y) > INPUT_MOVE_THRESHOLD)
 
-    def get_hover_progress(self, button_id):
-        if button_id not in self.hover_start_time:
+    def is_animating(self, now):
+        if self.overlay_visible:
+            return True
+        if (self.state == GameState.EASY_GAME and self.sequence_playing and
+                now - self.glow_start_time <= GLOW_DURATION):
+            return True
+        return self.hit_regions.next_change(now) == now
+
+    def idle_delay(self):
+        now = self.now()
+        if self.input_moved or self.is_animating(now):
             return 0.0
         
-        current_time = time.time()
-        elapsed = current_time - self.hover_start_time[button_id]
-        return min(elapsed / HOVER_TIME, 1.0)
+        wake_at = now + IDLE_FRAME_TIME
+        for due in (self.scheduler.next_due(), self.hit_regions.next_change(now)):
+            if due is not None:
+                wake_at = min(wake_at, due)
+        return max(0.0, wake_at - now)
 
-    def check_hover_click(self, button_id, rect):
-        current_time = time.time()
-        is_hover = self.is_hovering(rect)
-        
-        if is_hover:
-            if button_id not in self.hover_start_time:
-                self.hover_start_time[button_id] = current_time
-            elif current_time - self.hover_start_time[button_id] >= HOVER_TIME:
-                self.hover_start_time[button_id] = current_time + 1
-                return True
-        else:
-            if button_id in self.hover_start_time:
-                del self.hover_start_time[button_id]
-        
-        return False
+    def wait_for_input(self, delay):
+        self.waiting_for_input = True
+        event = pygame.event.wait(max(1, int(delay * 1000)))
+        self.waiting_for_input = False
+        if event.type != pygame.NOEVENT:
+            pygame.event.post(event)
+
+    def is_hovering(self, region_id):
+        return self.hit_regions.is_hovered(region_id)
+
+    def get_hover_progress(self, button_id):
+        return self.hit_regions.progress(button_id)
+
+    def check_hover_click(self, button_id):
+        return self.hit_regions.consume_click(button_id)
 
     def draw_loading_circle(self, surface, center, progress, radius=50):
-        cx, cy = center
-        
-        bg_surface = pygame.Surface((radius * 3, radius * 3), pygame.SRCALPHA)
-        pygame.draw.circle(bg_surface, (0, 0, 0, 120), (radius * 1.5, radius * 1.5), radius)
-        surface.blit(bg_surface, (cx - radius * 1.5, cy - radius * 1.5))
-        
-        pygame.draw.circle(surface, (100, 255, 100), (cx, cy), radius, 3)
-        
-        if progress > 0:
-            angle = int(progress * 360)
-            points = [(cx, cy)]
-            for i in range(angle + 1):
-                rad = math.radians(i - 90)
-                x = cx + int((radius - 5) * math.cos(rad))
-                y = cy + int((radius - 5) * math.sin(rad))
-                points.append((x, y))
-            
-            if len(points) > 2:
-                glow_surface = pygame.Surface((radius * 3, radius * 3), pygame.SRCALPHA)
-                adjusted_points = [(p[0] - cx + radius * 1.5, p[1] - cy + radius * 1.5) for p in points]
-                pygame.draw.polygon(glow_surface, (100, 255, 100, 180), adjusted_points)
-                surface.blit(glow_surface, (cx - radius * 1.5, cy - radius * 1.5))
-        
-        if progress > 0:
-            percent_text = f"{int(progress * 100)}%"
-            font = pygame.font.Font(None, 32)
-            text_surface = font.render(percent_text, True, (255, 255, 255))
-            text_rect = text_surface.get_rect(center=(cx, cy))
-            surface.blit(text_surface, text_rect)
+        self.progress_ring.draw(surface, center, progress, radius)
 
     def draw_glow_effect(self, surface, rect, intensity=1.0):
         x, y, w, h = rect
-        center_x = x + w // 2
-        center_y = y + h // 2
-        
-        for i in range(5, 0, -1):
-            alpha = int(50 * intensity * (i / 5))
-            radius = int((w // 2 + 20) * (1 + i * 0.15))
-            
-            glow_surface = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
-            color = (255, 255, 150, alpha)
-            pygame.draw.circle(glow_surface, color, (radius, radius), radius)
-            
-            surface.blit(glow_surface, (center_x - radius, center_y - radius))
+        sprite = self.glow_cache.get(w, h, intensity)
+        sprite_w, sprite_h = sprite.get_size()
+        surface.blit(sprite, (x + w // 2 - sprite_w // 2, y + h // 2 - sprite_h // 2))
 
     def start_new_game(self, difficulty="easy"):
         self.current_difficulty = difficulty
-        if difficulty == "easy":
-            self.current_recipe_name, self.current_recipe = random.choice(list(self.recipes_easy.items()))
-        else:
-            self.current_recipe_name, self.current_recipe = random.choice(list(self.recipes_hard.items()))
+        self.current_recipe_name, self.current_recipe = self.recipe_book.sample(difficulty)
+        self.recipe_cursor = self.recipe_book.cursor(difficulty, self.current_recipe)
         
+        self.session_count += 1
+        self.session_errors = 0
+        self.game_started_at = self.now()
+        self.record_event("game_start", difficulty=difficulty, recipe=self.current_recipe_name,
+                          length=len(self.current_recipe))
+        
+        self.player_sequence = []
+        self.showing_error = False
+        self.scheduler.cancel("error")
+        self.start_sequence(self.now())
+
+    def record_event(self, event, **fields):
+        self.telemetry.record(event, station=self.camera_index, session=self.session_count, **fields)
+
+    def start_sequence(self, start):
         self.sequence_playing = True
         self.sequence_index = 0
-        self.player_sequence = []
-        self.glow_start_time = time.time()
+        self.glow_start_time = start
+        self.scheduler.schedule("sequence", start + GLOW_DURATION + GLOW_PAUSE, self.advance_sequence)
+
+    def advance_sequence(self, due):
+        self.sequence_index += 1
+        if self.sequence_index >= len(self.current_recipe):
+            self.sequence_playing = False
+        else:
+            self.glow_start_time = due
+            self.scheduler.schedule("sequence", due + GLOW_DURATION + GLOW_PAUSE, self.advance_sequence)
+
+    def end_error(self, due):
         self.showing_error = False
+        self.start_sequence(due)
 
-    def update_sequence(self):
-        if not self.sequence_playing:
-            return
-            
-        current_time = time.time()
-        elapsed = current_time - self.glow_start_time
-        
-        if elapsed >= GLOW_DURATION + GLOW_PAUSE:
-            self.sequence_index += 1
-            if self.sequence_index >= len(self.current_recipe):
-                self.sequence_playing = False
-            else:
-                self.glow_start_time = current_time
+    def update_timers(self):
+        self.scheduler.run_due(self.now())
 
     def check_ingredient_clicks(self):
         if self.sequence_playing or self.showing_error:
             return
             
-        for ingredient, rect in self.ingredient_positions.items():
-            if self.check_hover_click(f"ingredient_{ingredient}", rect):
-                self.player_sequence.append(ingredient)
-                
-                expected_index = len(self.player_sequence) - 1
-                if expected_index < len(self.current_recipe):
-                    if ingredient != self.current_recipe[expected_index]:
-                        self.showing_error = True
-                        self.error_start_time = time.time()
-                        self.player_sequence = []
-                        return
-                
-                if len(self.player_sequence) == len(self.current_recipe):
-                    self.state = GameState.END_SUCCESS
-
-    def draw_error_message(self):
-        current_time = time.time()
-        if current_time - self.error_start_time >= 2.0:
-            self.showing_error = False
-            self.sequence_playing = True
-            self.sequence_index = 0
-            self.glow_start_time = current_time
+        hovered = self.hit_regions.hovered
+        if hovered is None or not hovered.startswith("ingredient_"):
             return
         
-        error_text = "Niestety nie udało się, spróbuj ponownie"
-        text_surface = self.error_font.render(error_text, True, (255, 0, 0))
+        dwell_time = self.hit_regions.dwell_time()
+        selection = "pinch" if self.hit_regions.clicked else "dwell"
+        if self.check_hover_click(hovered):
+            ingredient = hovered[len("ingredient_"):]
+            self.player_sequence.append(ingredient)
+            
+            correct = self.recipe_cursor.advance(ingredient)
+            self.record_event("ingredient", ingredient=ingredient, step=len(self.player_sequence),
+                              dwell_s=round(dwell_time, 3), selection=selection, correct=correct,
+                              possible=self.recipe_cursor.possible_count())
+            if not correct:
+                self.showing_error = True
+                self.error_start_time = self.now()
+                self.scheduler.schedule("error", self.error_start_time + ERROR_DURATION, self.end_error)
+                self.session_errors += 1
+                self.record_event("error", recipe=self.current_recipe_name, step=len(self.player_sequence))
+                self.player_sequence = []
+                self.recipe_cursor.reset()
+                return
+            
+            if self.recipe_cursor.complete():
+                self.state = GameState.END_SUCCESS
+                self.record_event("success", difficulty=self.current_difficulty, recipe=self.current_recipe_name,
+                                  time_to_success_s=round(self.now() - self.game_started_at, 3),
+                                  errors=self.session_errors)
+
+    def draw_error_message(self):
+        text_surface = self.text_cache.render(self.error_font, ERROR_MESSAGE, (255, 0, 0))
         text_rect = text_surface.get_rect(center=(SCREEN_WIDTH // 2, 100))
-        self.screen.blit(text_surface, text_rect)
+        self.canvas.blit(text_surface, text_rect)
 
     def draw_start_screen(self):
-        self.screen.blit(self.backgrounds["start"], (0, 0))
+        self.canvas.blit(self.backgrounds["start"], (0, 0))
         
         start_rect = self.button_positions["start"]
-        if self.is_hovering(start_rect):
-            self.draw_glow_effect(self.screen, start_rect, 0.8)
+        if self.is_hovering("start"):
+            self.draw_glow_effect(self.canvas, start_rect, 0.8)
             
             progress = self.get_hover_progress("start")
             if progress > 0:
                 x, y, w, h = start_rect
                 center = (x + w // 2, y + h // 2)
-                self.draw_loading_circle(self.screen, center, progress)
+                self.draw_loading_circle(self.canvas, center, progress)
         
-        if self.check_hover_click("start", start_rect):
+        if self.check_hover_click("start"):
             self.state = GameState.DIFFICULTY
 
     def draw_difficulty_screen(self):
-        self.screen.blit(self.backgrounds["difficulty"], (0, 0))
+        self.canvas.blit(self.backgrounds["difficulty"], (0, 0))
         
         easy_rect = self.button_positions["easy"]
-        if self.is_hovering(easy_rect):
-            self.draw_glow_effect(self.screen, easy_rect, 0.8)
+        if self.is_hovering("easy"):
+            self.draw_glow_effect(self.canvas, easy_rect, 0.8)
             
             progress = self.get_hover_progress("easy")
             if progress > 0:
                 x, y, w, h = easy_rect
                 center = (x + w // 2, y + h // 2)
-                self.draw_loading_circle(self.screen, center, progress)
+                self.draw_loading_circle(self.canvas, center, progress)
         
         hard_rect = self.button_positions["hard"]
-        if self.is_hovering(hard_rect):
-            self.draw_glow_effect(self.screen, hard_rect, 0.8)
+        if self.is_hovering("hard"):
+            self.draw_glow_effect(self.canvas, hard_rect, 0.8)
             
             progress = self.get_hover_progress("hard")
             if progress > 0:
                 x, y, w, h = hard_rect
                 center = (x + w // 2, y + h // 2)
-                self.draw_loading_circle(self.screen, center, progress)
+                self.draw_loading_circle(self.canvas, center, progress)
         
-        if self.check_hover_click("easy", easy_rect):
+        if self.check_hover_click("easy"):
             self.state = GameState.EASY_GAME
             self.start_new_game("easy")
         
-        if self.check_hover_click("hard", hard_rect):
+        if self.check_hover_click("hard"):
             self.state = GameState.EASY_GAME
             self.start_new_game("hard")
 
     def draw_easy_game_screen(self):
-        self.screen.blit(self.backgrounds["easy"], (0, 0))
+        self.canvas.blit(self.backgrounds["easy"], (0, 0))
         
-        title_surface = self.title_font.render(self.current_recipe_name, True, (255, 255, 255))
+        title_surface = self.text_cache.render(self.title_font, self.current_recipe_name, (255, 255, 255))
         title_rect = title_surface.get_rect(center=(SCREEN_WIDTH // 2, 50))
-        self.screen.blit(title_surface, title_rect)
+        self.canvas.blit(title_surface, title_rect)
         
         for i, (ingredient, rect) in enumerate(self.ingredient_positions.items()):
-            self.screen.blit(self.ingredients[ingredient], (rect[0], rect[1]))
+            self.canvas.blit(self.ingredients[ingredient], (rect[0], rect[1]))
             
             if (self.sequence_playing and 
                 self.sequence_index < len(self.current_recipe) and
                 ingredient == self.current_recipe[self.sequence_index]):
                 
-                current_time = time.time()
+                current_time = self.now()
                 elapsed = current_time - self.glow_start_time
                 if elapsed <= GLOW_DURATION:
                     intensity = 1.0 - (elapsed / GLOW_DURATION * 0.5)
-                    self.draw_glow_effect(self.screen, rect, intensity)
+                    self.draw_glow_effect(self.canvas, rect, intensity)
             
-            elif not self.sequence_playing and not self.showing_error and self.is_hovering(rect):
-                self.draw_glow_effect(self.screen, rect, 0.7)
+            elif not self.sequence_playing and not self.showing_error and self.is_hovering(f"ingredient_{ingredient}"):
+                self.draw_glow_effect(self.canvas, rect, 0.7)
                 
                 progress = self.get_hover_progress(f"ingredient_{ingredient}")
                 if progress > 0:
                     x, y, w, h = rect
                     center = (x + w // 2, y + h // 2)
-                    self.draw_loading_circle(self.screen, center, progress, radius=40)
+                    self.draw_loading_circle(self.canvas, center, progress, radius=40)
         
-        self.update_sequence()
+        t = self.profiler.now()
         self.check_ingredient_clicks()
+        self.profiler.lap("check_ingredient_clicks", t)
         
         if self.showing_error:
             self.draw_error_message()
 
     def draw_end_success_screen(self):
-        self.screen.blit(self.backgrounds["end"], (0, 0))
+        self.canvas.blit(self.backgrounds["end"], (0, 0))
         
         play_again_rect = self.button_positions["play_again_success"]
         
-        if self.is_hovering(play_again_rect):
-            self.draw_glow_effect(self.screen, play_again_rect, 0.8)
+        if self.is_hovering("play_again_success"):
+            self.draw_glow_effect(self.canvas, play_again_rect, 0.8)
             
             progress = self.get_hover_progress("play_again_success")
             if progress > 0:
                 x, y, w, h = play_again_rect
                 center = (x + w // 2, y + h // 2)
-                self.draw_loading_circle(self.screen, center, progress)
+                self.draw_loading_circle(self.canvas, center, progress)
         
         try:
-            self.screen.blit(self.play_again_button, (play_again_rect[0], play_again_rect[1]))
+            self.canvas.blit(self.play_again_button, (play_again_rect[0], play_again_rect[1]))
         except:
-            pygame.draw.rect(self.screen, (100, 255, 100), play_again_rect)
-            text = self.error_font.render("ZAGRAJ PONOWNIE", True, (255, 255, 255))
+            self.canvas.fill((100, 255, 100), play_again_rect)
+            text = self.text_cache.render(self.error_font, PLAY_AGAIN_LABEL, (255, 255, 255))
             text_rect = text.get_rect(center=(play_again_rect[0] + play_again_rect[2]//2, 
                                              play_again_rect[1] + play_again_rect[3]//2))
-            self.screen.blit(text, text_rect)
+            self.canvas.blit(text, text_rect)
         
-        if self.check_hover_click("play_again_success", play_again_rect):
+        if self.check_hover_click("play_again_success"):
             self.state = GameState.DIFFICULTY
 
     def draw_end_failure_screen(self):
-        self.screen.blit(self.backgrounds["failure"], (0, 0))
+        self.canvas.blit(self.backgrounds["failure"], (0, 0))
         
         play_again_rect = self.button_positions["play_again_failure"]
         
-        if self.is_hovering(play_again_rect):
-            self.draw_glow_effect(self.screen, play_again_rect, 0.8)
+        if self.is_hovering("play_again_failure"):
+            self.draw_glow_effect(self.canvas, play_again_rect, 0.8)
             
             progress = self.get_hover_progress("play_again_failure")
             if progress > 0:
                 x, y, w, h = play_again_rect
                 center = (x + w // 2, y + h // 2)
-                self.draw_loading_circle(self.screen, center, progress)
+                self.draw_loading_circle(self.canvas, center, progress)
         
-        if self.check_hover_click("play_again_failure", play_again_rect):
+        if self.check_hover_click("play_again_failure"):
             self.state = GameState.DIFFICULTY
 
     def draw_finger_cursor(self):
-        draw_x = None
-        draw_y = None
+        draw_x = self.input.x
+        draw_y = self.input.y
         
-        with self.finger_lock:
-            if self.finger_x is not None and self.finger_y is not None:
-                draw_x = self.finger_x
-                draw_y = self.finger_y
+        if draw_x is not None and draw_y is not None:
+            half = self.cursor_sprite.get_width() // 2
+            self.canvas.blit(self.cursor_sprite, (draw_x - half, draw_y - half))
+            if self.tracking_status == TRACKING_READY:
+                return
+        self.canvas.blit(self.tracking_sprites[self.tracking_status], (SCREEN_WIDTH - 70, 30))
+
+    def build_cursor_sprites(self):
+        self.cursor_sprite = pygame.Surface((32, 32), pygame.SRCALPHA)
+        pygame.draw.circle(self.cursor_sprite, (255, 50, 50), (16, 16), 15)
+        pygame.draw.circle(self.cursor_sprite, (255, 255, 255), (16, 16), 8)
+        pygame.draw.circle(self.cursor_sprite, (255, 50, 50), (16, 16), 3)
         
-        if draw_x is None and self.mouse_x is not None:
-            draw_x = self.mouse_x
-            draw_y = self.mouse_y
+        self.no_tracking_sprite = pygame.Surface((40, 40), pygame.SRCALPHA)
+        pygame.draw.circle(self.no_tracking_sprite, (100, 100, 100), (20, 20), 20)
+        pygame.draw.circle(self.no_tracking_sprite, (200, 50, 50), (20, 20), 15)
+        pygame.draw.line(self.no_tracking_sprite, (255, 255, 255), (10, 10), (30, 30), 3)
+        pygame.draw.line(self.no_tracking_sprite, (255, 255, 255), (30, 10), (10, 30), 3)
         
-        if draw_x is not None and draw_y is not None:
-            pygame.draw.circle(self.screen, (255, 50, 50), (draw_x, draw_y), 15)
-            pygame.draw.circle(self.screen, (255, 255, 255), (draw_x, draw_y), 8)
-            pygame.draw.circle(self.screen, (255, 50, 50), (draw_x, draw_y), 3)
-        else:
-            pygame.draw.circle(self.screen, (100, 100, 100), (SCREEN_WIDTH - 50, 50), 20)
-            pygame.draw.circle(self.screen, (200, 50, 50), (SCREEN_WIDTH - 50, 50), 15)
-            pygame.draw.line(self.screen, (255, 255, 255), (SCREEN_WIDTH - 60, 40), (SCREEN_WIDTH - 40, 60), 3)
-            pygame.draw.line(self.screen, (255, 255, 255), (SCREEN_WIDTH - 40, 40), (SCREEN_WIDTH - 60, 60), 3)
+        starting_sprite = pygame.Surface((40, 40), pygame.SRCALPHA)
+        pygame.draw.circle(starting_sprite, (100, 100, 100), (20, 20), 20)
+        pygame.draw.circle(starting_sprite, (230, 170, 40), (20, 20), 15)
+        for x in (12, 20, 28):
+            pygame.draw.circle(starting_sprite, (255, 255, 255), (x, 20), 3)
+        
+        failed_sprite = pygame.Surface((40, 40), pygame.SRCALPHA)
+        pygame.draw.circle(failed_sprite, (100, 100, 100), (20, 20), 20)
+        pygame.draw.circle(failed_sprite, (60, 60, 60), (20, 20), 15)
+        pygame.draw.line(failed_sprite, (200, 200, 200), (10, 10), (30, 30), 3)
+        pygame.draw.line(failed_sprite, (200, 200, 200), (30, 10), (10, 30), 3)
+        
+        self.tracking_sprites = {
+            TRACKING_STARTING: starting_sprite,
+            TRACKING_READY: self.no_tracking_sprite,
+            TRACKING_FAILED: failed_sprite
+        }
 
-    def run(self):
+    def draw_state(self):
+        if self.state == GameState.START:
+            self.draw_start_screen()
+        elif self.state == GameState.DIFFICULTY:
+            self.draw_difficulty_screen()
+        elif self.state == GameState.EASY_GAME:
+            self.draw_easy_game_screen()
+        elif self.state == GameState.END_SUCCESS:
+            self.draw_end_success_screen()
+        elif self.state == GameState.END_FAILURE:
+            self.draw_end_failure_screen()
+
+    def handle_events(self):
         running = True
+        for event in pygame.event.get():
+            if not self.handle_event(event):
+                running = False
+        return running
+
+    def handle_event(self, event):
+        if event.type in (pygame.QUIT, pygame.WINDOWCLOSE):
+            return False
+        elif event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_ESCAPE:
+                return False
+            elif event.key == PROFILE_OVERLAY_KEY:
+                self.toggle_overlay()
+        elif event.type == pygame.MOUSEMOTION:
+            self.mouse_x, self.mouse_y = event.pos
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            self.mouse_x, self.mouse_y = event.pos
+        elif event.type in EXPOSE_EVENTS:
+            # Without a compositor the uncovered window content is lost, and the
+            # idle loop would otherwise only push rects that changed.
+            self.canvas.invalidate()
+        return True
+
+    def toggle_overlay(self):
+        self.overlay_visible = not self.overlay_visible
+        self.profiler.enabled = PROFILING or self.overlay_visible
+        self.overlay_surface = None
+        if self.overlay_font is None:
+            self.overlay_font = self.text_cache.get_font(pygame.font.match_font("monospace"), 16)
+
+    def draw_profile_overlay(self):
+        if self.overlay_surface is None or self.overlay_age >= PROFILE_OVERLAY_REFRESH:
+            lines = ["etap                      sred    p95   maks [ms]"] + self.profiler.overlay_lines()
+            font = self.overlay_font
+            line_height = font.get_linesize()
+            width = max(font.size(line)[0] for line in lines) + 20
+            self.overlay_surface = pygame.Surface((width, line_height * len(lines) + 20), pygame.SRCALPHA)
+            self.overlay_surface.fill((0, 0, 0, 170))
+            for i, line in enumerate(lines):
+                self.overlay_surface.blit(font.render(line, True, (200, 255, 200)), (10, 10 + i * line_height))
+            self.overlay_age = 0
+        
+        self.overlay_age += 1
+        self.canvas.blit(self.overlay_surface, (10, 10))
+
+    def step(self, events=True):
+        t = self.profiler.now()
+        running = self.handle_events() if events else True
+        t = self.profiler.lap("events", t)
+        
+        self.load_state_assets(self.state)
+        self.update_input()
+        t = self.profiler.lap("input", t)
+        self.update_timers()
+        t = self.profiler.lap("timers", t)
+        
+        if self.state != self.drawn_state:
+            self.canvas.invalidate()
+            self.drawn_state = self.state
+        self.canvas.begin()
+        
+        self.draw_state()
+        t = self.profiler.lap("draw", t)
+        self.draw_finger_cursor()
+        t = self.profiler.lap("cursor", t)
+        
+        if self.overlay_visible:
+            self.draw_profile_overlay()
+        
+        self.canvas.present()
+        self.profiler.lap("present", t)
+        
+        if "first_frame_s" not in self.startup_times:
+            self.startup_times["first_frame_s"] = time.perf_counter() - self.created_at
+        if not self.startup_reported and self.tracking_status != TRACKING_STARTING:
+            self.report_startup()
+        return running
+
+    def report_startup(self):
+        self.startup_reported = True
+        message = f"Pierwsza klatka po {self.startup_times['first_frame_s']:.2f} s"
+        if "tracking_s" in self.startup_times:
+            message += f", śledzenie gotowe po {self.startup_times['tracking_s']:.2f} s"
+        elif self.tracking_status == TRACKING_FAILED:
+            message += ", śledzenie niedostępne"
+        print(message)
+
+    def run(self):
+        while self.step():
+            self.clock.tick(FPS)
+            delay = self.idle_delay()
+            if delay > 0:
+                self.wait_for_input(delay)
+        
+        self.stop_camera()
+        if self.profiler.has_samples():
+            self.profiler.export()
+        pygame.quit()
+
+
+class StationHost:
+    def __init__(self, camera_indices, workers=None, columns=None):
+        self.columns = columns or math.ceil(math.sqrt(len(camera_indices)))
+        rows = math.ceil(len(camera_indices) / self.columns)
+        self.screen = pygame.display.set_mode((SCREEN_WIDTH * self.columns, SCREEN_HEIGHT * rows))
+        pygame.display.set_caption("Gra Eliksirów")
+        self.clock = pygame.time.Clock()
+        
+        self.resources = GameResources()
+        self.telemetry = TelemetryWriter()
+        self.tracking_pool = TrackingPool(workers)
+        self.viewports = []
+        self.stations = []
+        for i, camera_index in enumerate(camera_indices):
+            viewport = pygame.Rect((i % self.columns) * SCREEN_WIDTH, (i // self.columns) * SCREEN_HEIGHT,
+                                   SCREEN_WIDTH, SCREEN_HEIGHT)
+            station = ElixirGame(screen=self.screen.subsurface(viewport), resources=self.resources,
+                                 camera_index=camera_index, tracking_pool=self.tracking_pool,
+                                 telemetry=self.telemetry)
+            station.stats = StationStats()
+            self.viewports.append(viewport)
+            self.stations.append(station)
+        self.tracking_pool.start()
+        self.loop_stats = StageTimings()
+        self.full_update = False
+
+    def dispatch(self, event):
+        if event.type in EXPOSE_EVENTS:
+            self.full_update = True
+        if event.type not in (pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN):
+            running = True
+            for station in self.stations:
+                if not station.handle_event(event):
+                    running = False
+            return running
         
+        for station, viewport in zip(self.stations, self.viewports):
+            if viewport.collidepoint(event.pos):
+                local = (event.pos[0] - viewport.x, event.pos[1] - viewport.y)
+                station.handle_event(pygame.event.Event(event.type, pos=local))
+            else:
+                station.mouse_x = None
+                station.mouse_y = None
+        return True
+
+    def wait_for_input(self, delay):
+        for station in self.stations:
+            station.waiting_for_input = True
+        event = pygame.event.wait(max(1, int(delay * 1000)))
+        for station in self.stations:
+            station.waiting_for_input = False
+        if event.type != pygame.NOEVENT:
+            pygame.event.post(event)
+
+    def report(self):
+        loop = self.loop_stats.summary()
+        print(f"Pętla: {len(self.stations)} stanowisk, {loop['mean_ms']:.1f} ms na klatkę "
+              f"(p95 {loop['p95_ms']:.1f}), budżet {1000 / FPS:.1f} ms, procesy śledzenia: "
+              f"{len(self.tracking_pool.processes)}")
+        for i, station in enumerate(self.stations):
+            stats = station.stats.report()
+            print(f"  Stanowisko {i + 1} (kamera {station.camera_index}): {stats['fps']:.1f} kl./s, "
+                  f"klatka {stats['frame']['mean_ms']:.1f} ms, śledzenie {stats['tracking_rate']:.1f}/s, "
+                  f"wnioskowanie {stats['inference']['mean_ms']:.1f} ms (p95 {stats['inference']['p95_ms']:.1f}), "
+                  f"opóźnienie {stats['latency']['mean_ms']:.1f} ms (p95 {stats['latency']['p95_ms']:.1f})")
+
+    def run(self):
+        running = True
+        report_at = time.perf_counter() + STATION_REPORT_INTERVAL
         while running:
+            loop_started = time.perf_counter()
             for event in pygame.event.get():
-                if event.type == pygame.QUIT:
+                if not self.dispatch(event):
                     running = False
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE:
-                        running = False
-                elif event.type == pygame.MOUSEMOTION:
-                    self.mouse_x, self.mouse_y = event.pos
-                elif event.type == pygame.MOUSEBUTTONDOWN:
-                    self.mouse_x, self.mouse_y = event.pos
             
-            if self.state == GameState.START:
-                self.draw_start_screen()
-            elif self.state == GameState.DIFFICULTY:
-                self.draw_difficulty_screen()
-            elif self.state == GameState.EASY_GAME:
-                self.draw_easy_game_screen()
-            elif self.state == GameState.END_SUCCESS:
-                self.draw_end_success_screen()
-            elif self.state == GameState.END_FAILURE:
-                self.draw_end_failure_screen()
+            updated = []
+            for station in self.stations:
+                started = time.perf_counter()
+                station.step(events=False)
+                station.stats.add_frame(time.perf_counter() - started)
+                updated.extend(station.canvas.updated)
+            if self.full_update:
+                pygame.display.flip()
+                self.full_update = False
+            elif updated:
+                pygame.display.update(updated)
             
-            self.draw_finger_cursor()
+            now = time.perf_counter()
+            self.loop_stats.add(now - loop_started, now)
+            if now >= report_at:
+                self.report()
+                report_at = now + STATION_REPORT_INTERVAL
             
-            pygame.display.flip()
-            self.clock.tick(60)
+            self.clock.tick(FPS)
+            delay = min(station.idle_delay() for station in self.stations)
+            if delay > 0:
+                self.wait_for_input(delay)
         
-        self.camera_running = False
-        self.cap.release()
+        self.report()
+        for station in self.stations:
+            station.stop_camera()
+        self.tracking_pool.close()
+        self.telemetry.close()
         pygame.quit()
 
 if __name__ == "__main__":
-    game = ElixirGame()
-    game.run()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Gra Eliksirów")
+    parser.add_argument("--replay", help="odtwarzaj pozycje palca z pliku .npy zamiast kamery")
+    parser.add_argument("--tracking-process", action="store_true", help="śledzenie dłoni w osobnym procesie")
+    parser.add_argument("--cameras", type=int, nargs="+",
+                        help="tryb wielu stanowisk: indeksy kamer, jedno stanowisko na kamerę")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="liczba procesów śledzenia w trybie stanowisk (domyślnie liczba rdzeni - 1)")
+    parser.add_argument("--columns", type=int, default=None, help="liczba stanowisk w jednym rzędzie okna")
+    parser.add_argument("--renderer", choices=RENDER_BACKENDS, default=RENDER_BACKEND,
+                        help="sposób rysowania: powierzchnie pygame, tekstury SDL lub tekstury "
+                             "z programowym rendererem SDL (tylko tryb jednego stanowiska)")
+    args = parser.parse_args()
+    
+    if args.cameras:
+        StationHost(args.cameras, workers=args.workers, columns=args.columns).run()
+    else:
+        game = ElixirGame(landmark_cache=args.replay, tracking_process=args.tracking_process, renderer=args.renderer)
+        game.run()
\ No newline at end of file